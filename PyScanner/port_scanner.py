@@ -1,4 +1,5 @@
 import socket
+import errno
 import argparse
 import ipaddress
 import csv
@@ -7,7 +8,7 @@ import time
 import textwrap
 import sys
 import threading
-from queue import Queue
+from collections import deque
 from fpdf import FPDF
 
 # --- Configuration ---
@@ -16,12 +17,16 @@ DEFAULT_PORTS = "21,22,23,25,80,110,139,443,445,3389,8080"
 TOP_1024_PORTS_RAW = "1-1024" # Ports 1 through 1024
 FULL_PORTS_RAW = "1-65535" # All possible TCP ports
 TIMEOUT = 1.0  # seconds
+SHUTDOWN_GRACE = TIMEOUT # Seconds to let in-flight probes finish after a cancel
 DEFAULT_THREADS = 50 # Default number of concurrent threads for scanning
+# Ports that are most often found open. In deadline mode these are probed first
+# on every host so a short maintenance window still covers the likely services.
+LIKELY_OPEN_PORTS = [80, 443, 22, 21, 25, 3389, 8080, 445, 139, 110, 23, 53, 135,
+                     143, 3306, 8443, 993, 995, 5900, 1723, 111, 587, 8000, 5432]
 
 # Thread-safe structures
 print_lock = threading.Lock()
 result_lock = threading.Lock()
-# Initialize Queue globally to hold ports or tasks
 
 # --- Utility Functions ---
 
@@ -98,9 +103,184 @@ def parse_ports(port_string):
         print(f"Error parsing ports: {e}. Please use a format like '21,22,80-100'.")
         return None
 
+def format_port_ranges(ports):
+    """
+    Collapses a list of ports into a compact range string (e.g., [1,2,3,80] -> "1-3,80").
+    """
+    blocks = []
+    for port in sorted(ports):
+        if blocks and port == blocks[-1][1] + 1:
+            blocks[-1][1] = port
+        else:
+            blocks.append([port, port])
+    return ','.join(str(start) if start == end else f"{start}-{end}" for start, end in blocks)
+
 
 # --- Scanning Logic ---
 
+class ScanScheduler:
+    """
+    Hands out (ip, port) tasks to the worker threads.
+
+    Without a deadline, tasks are served host by host in ascending port order.
+    With a deadline (in seconds), likely-open ports are probed first across all
+    hosts, hosts that answer on any port (open, or refused with a RST) are
+    promoted ahead of silent ones, and
+    no new task is handed out once the measured time per task no longer fits in
+    the remaining window. Ports that were never probed are reported afterwards
+    by uncovered_blocks().
+
+    cancel() stops the hand-out immediately (e.g. on Ctrl+C); probes that are
+    still in flight when the scan is finalized are reported as not covered.
+    Failed probes are counted per error type in self.errors and reported as
+    not covered as well.
+    """
+
+    def __init__(self, target_ip_list, ports_to_scan, deadline=None):
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.deadline_at = self.start_time + deadline if deadline is not None else None
+        self.total_tasks = len(target_ip_list) * len(ports_to_scan)
+        self.completed = 0
+        self.busy_time = 0.0 # Sum of per-task durations, used to estimate task latency
+        self.expired = False
+        self.warned = False
+        self.live_hosts = set()
+        self.in_flight = set()
+        self.errors = {} # "ErrorType: message" -> count
+        self.failed = 0
+        self.failed_ports = {} # ip -> ports whose probe raised
+        self.stop_event = threading.Event()
+        self.closed = False # Set (under result_lock) once results are finalized
+
+        if self.deadline_at is None:
+            likely_ports, other_ports = [], sorted(ports_to_scan)
+        else:
+            rank = {port: i for i, port in enumerate(LIKELY_OPEN_PORTS)}
+            likely_ports = sorted((p for p in ports_to_scan if p in rank), key=rank.get)
+            other_ports = sorted(p for p in ports_to_scan if p not in rank)
+
+        # Pending ports per host: (likely-open ports, remaining ports)
+        self.pending = {ip: (deque(likely_ports), deque(other_ports)) for ip in target_ip_list}
+        # Host order for the plain (no deadline) mode
+        self.host_order = deque(target_ip_list)
+        # Round-robin host queues for deadline mode, served in this order:
+        # (host is live, port kind, hosts). Unknown hosts that turn out to be
+        # live are appended to the live queues and skipped in the unknown ones.
+        self.tiers = [
+            (True, 0, deque()),
+            (False, 0, deque(target_ip_list)),
+            (True, 1, deque()),
+            (False, 1, deque(target_ip_list)),
+        ]
+
+    def next_task(self):
+        """Returns the next (ip, port) to probe, or None when no work is left to hand out."""
+        with self.lock:
+            if self.stop_event.is_set():
+                return None
+            if self.deadline_at is None:
+                task = self._next_in_order()
+            elif self.expired or time.time() + self._task_estimate() > self.deadline_at:
+                self.expired = True
+                return None
+            else:
+                task = self._next_prioritized()
+            if task is not None:
+                self.in_flight.add(task)
+            return task
+
+    def cancel(self):
+        """Stops handing out new tasks. Workers exit after their current probe."""
+        self.stop_event.set()
+
+    def cancelled(self):
+        return self.stop_event.is_set()
+
+    def record_error(self, ip, port, error):
+        """Counts a probe that failed with an unexpected error; its port stays uncovered."""
+        key = f"{type(error).__name__}: {error}"
+        with self.lock:
+            self.failed += 1
+            self.failed_ports.setdefault(ip, []).append(port)
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def task_done(self, ip, port, duration, answered):
+        """Records a finished probe and promotes the host if it answered (port open or refused)."""
+        with self.lock:
+            self.in_flight.discard((ip, port))
+            self.completed += 1
+            self.busy_time += duration
+            if answered and ip not in self.live_hosts:
+                self.live_hosts.add(ip)
+                for is_live, kind, hosts in self.tiers:
+                    if is_live and self.pending[ip][kind]:
+                        hosts.append(ip)
+            self._check_projection()
+
+    def throughput(self):
+        """Completed tasks per second since the scan started."""
+        elapsed = time.time() - self.start_time
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def uncovered_blocks(self):
+        """Returns {ip: "port ranges"} for every host with ports that were never (fully) probed or whose probe failed."""
+        with self.lock:
+            unfinished = {}
+            for ip, port in self.in_flight:
+                unfinished.setdefault(ip, []).append(port)
+            uncovered = {}
+            for ip, (likely, rest) in self.pending.items():
+                ports = set(likely) | set(rest) | set(unfinished.get(ip, ())) | set(self.failed_ports.get(ip, ()))
+                if ports:
+                    uncovered[ip] = format_port_ranges(ports)
+            return uncovered
+
+    def _task_estimate(self):
+        # Average wall time of one probe; assume a full timeout until we have data
+        if not self.completed:
+            return TIMEOUT
+        return self.busy_time / self.completed
+
+    def _check_projection(self):
+        # Warn once if the measured throughput will not cover the whole scan in time
+        if self.deadline_at is None or self.warned or self.completed < 100:
+            return
+        rate = self.throughput()
+        remaining_time = self.deadline_at - time.time()
+        remaining_tasks = self.total_tasks - self.completed
+        if rate > 0 and remaining_tasks / rate > remaining_time:
+            self.warned = True
+            coverable = min(self.total_tasks, self.completed + int(rate * max(remaining_time, 0)))
+            with print_lock:
+                print(f"  [INFO] At ~{rate:.0f} probes/s the window covers about {coverable} of {self.total_tasks} probes. "
+                      "Prioritizing likely-open ports and live hosts.")
+
+    def _next_in_order(self):
+        while self.host_order:
+            ip = self.host_order[0]
+            ports = self.pending[ip][1]
+            if ports:
+                return ip, ports.popleft()
+            self.host_order.popleft()
+        return None
+
+    def _next_prioritized(self):
+        for is_live, kind, hosts in self.tiers:
+            while hosts:
+                ip = hosts.popleft()
+                if not is_live and ip in self.live_hosts:
+                    continue # Promoted; this host is served from the live queues now
+                ports = self.pending[ip][kind]
+                if not ports:
+                    continue
+                port = ports.popleft()
+                if ports:
+                    hosts.append(ip)
+                return ip, port
+        return None
+
+
 def banner_grab(ip, port):
     """
     Connects to an open port and attempts to retrieve a service banner.
@@ -137,69 +317,86 @@ def banner_grab(ip, port):
             sock.close()
 
 
-def port_scan_worker(q, all_results):
+def probe_port(ip, port):
     """
-    Worker thread function: pulls (ip, port) tasks from the queue and executes the scan.
+    Attempts a TCP connect to ip:port. Returns the connect_ex result: 0 if the
+    port is open, errno.ECONNREFUSED if the host answered with a RST, another
+    errno (e.g., a timeout) if it did not answer.
+    Raises on unexpected socket errors (e.g., too many open files).
     """
-    while not q.empty():
-        try:
-            ip, port = q.get_nowait()
-        except Queue.Empty:
-            break # Queue is empty, exit worker
-        
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
         sock.settimeout(TIMEOUT)
-        
-        is_open = False
+        return sock.connect_ex((ip, port))
+    finally:
+        sock.close()
+
+
+def port_scan_worker(scheduler, all_results):
+    """
+    Worker thread function: pulls (ip, port) tasks from the scheduler and executes the scan.
+    Every task is reported back to the scheduler, even if the probe raised.
+    """
+    while True:
+        task = scheduler.next_task()
+        if task is None:
+            break # No work left, deadline reached or scan cancelled, exit worker
+
+        ip, port = task
+        task_start = time.time()
+        answered = False
         try:
-            # Returns 0 on success, non-zero on failure
-            result = sock.connect_ex((ip, port))
+            result = probe_port(ip, port)
+            # A refused connection still proves the host is up
+            answered = result in (0, errno.ECONNREFUSED)
             if result == 0:
-                is_open = True
-        except socket.error:
-            pass # Ignore socket errors in workers
+                # Acquire print lock to prevent messy console output
+                with print_lock:
+                    print(f"  [OPEN] TCP/{port} found on {ip}.")
+
+                if scheduler.cancelled():
+                    banner = "Banner grab skipped (scan cancelled)."
+                else:
+                    banner = banner_grab(ip, port)
+
+                # Simple service detection
+                service = "Unknown"
+                if port == 21: service = "FTP"
+                elif port == 22: service = "SSH"
+                elif port == 23: service = "Telnet"
+                elif port == 25: service = "SMTP"
+                elif port == 80: service = "HTTP"
+                elif port == 443: service = "HTTPS"
+                elif port == 3389: service = "RDP"
+
+                if "ssh" in banner.lower() and service == "Unknown": service = "SSH"
+                if "http" in banner.lower() and service == "Unknown": service = "HTTP/HTTPS"
+
+                result_data = {
+                    'IP Address': ip,
+                    'Port': port,
+                    'Status': 'OPEN',
+                    'Service': service,
+                    'Banner/Version': banner
+                }
+
+                # Acquire result lock to safely update the shared list.
+                # Results that arrive after the report was finalized are dropped.
+                with result_lock:
+                    if not scheduler.closed:
+                        all_results.append(result_data)
+        except Exception as e:
+            scheduler.record_error(ip, port, e)
         finally:
-            sock.close()
-            
-        if is_open:
-            # Acquire print lock to prevent messy console output
-            with print_lock:
-                print(f"  [OPEN] TCP/{port} found on {ip}.")
-                
-            banner = banner_grab(ip, port)
-            
-            # Simple service detection
-            service = "Unknown"
-            if port == 21: service = "FTP"
-            elif port == 22: service = "SSH"
-            elif port == 23: service = "Telnet"
-            elif port == 25: service = "SMTP"
-            elif port == 80: service = "HTTP"
-            elif port == 443: service = "HTTPS"
-            elif port == 3389: service = "RDP"
-            
-            if "ssh" in banner.lower() and service == "Unknown": service = "SSH"
-            if "http" in banner.lower() and service == "Unknown": service = "HTTP/HTTPS"
-            
-            result_data = {
-                'IP Address': ip,
-                'Port': port,
-                'Status': 'OPEN',
-                'Service': service,
-                'Banner/Version': banner
-            }
-            
-            # Acquire result lock to safely update the shared list
-            with result_lock:
-                all_results.append(result_data)
-
-        # Signal that the task is done
-        q.task_done()
+            # Signal that the task is done
+            scheduler.task_done(ip, port, time.time() - task_start, answered)
 
 
-def run_scan(target_ip_list, ports_to_scan, num_threads):
+def run_scan(target_ip_list, ports_to_scan, num_threads, deadline=None):
     """
     Main function to orchestrate the multithreaded scan.
+    If a deadline (in seconds) is given, the scan stops handing out work when the
+    window closes and reports the host/port blocks that were not covered.
     """
     all_results = []
     
@@ -208,37 +405,70 @@ def run_scan(target_ip_list, ports_to_scan, num_threads):
     scan_start_time = time.time()
     
     print(f"\n--- Starting Scan of {total_ips} Host(s) on {total_ports} Port(s) with {num_threads} Threads ---")
+    if deadline is not None:
+        print(f"Deadline: {deadline}s. Likely-open ports and live hosts are scanned first.")
     
-    # 1. Create a queue of (ip, port) tasks
-    q = Queue()
-    for ip in target_ip_list:
-        # For multithreading simplicity, we add all (IP, Port) combinations as tasks
-        for port in ports_to_scan:
-            q.put((ip, port))
+    # 1. Create the scheduler that hands out (ip, port) tasks
+    scheduler = ScanScheduler(target_ip_list, ports_to_scan, deadline)
 
     # 2. Create and start the worker threads
     threads = []
     for _ in range(num_threads):
-        t = threading.Thread(target=port_scan_worker, args=(q, all_results))
+        t = threading.Thread(target=port_scan_worker, args=(scheduler, all_results))
         t.daemon = True # Allows the main program to exit even if threads are still running
         t.start()
         threads.append(t)
 
-    # 3. Wait for the queue to be empty
+    # 3. Wait for the workers to run out of tasks. Poll with a short timeout so
+    #    Ctrl+C is handled promptly on every platform.
     try:
-        q.join()
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(0.2)
     except KeyboardInterrupt:
-        print("\nScan interrupted by user (Ctrl+C). Generating report for current results.")
-        # If interrupted, we don't wait for threads, just proceed to reporting
+        print("\nScan interrupted by user (Ctrl+C). Waiting for in-flight probes, then generating report.")
+        scheduler.cancel()
+        # Give in-flight probes one timeout period to finish; a second Ctrl+C skips the wait
+        try:
+            grace_end = time.time() + SHUTDOWN_GRACE
+            for t in threads:
+                t.join(max(0, grace_end - time.time()))
+        except KeyboardInterrupt:
+            pass
+
+    # Freeze the results so late workers cannot change the report
+    with result_lock:
+        scheduler.closed = True
+        results = list(all_results)
         
     scan_end_time = time.time()
     elapsed_time = scan_end_time - scan_start_time
     
-    print(f"\n--- Scan Complete ---")
+    print(f"\n--- Scan Complete ---" if not scheduler.cancelled() else "\n--- Scan Stopped ---")
     print(f"Total time elapsed: {elapsed_time:.2f} seconds.")
-    print(f"Found {len(all_results)} open port(s).")
+    print(f"Probed {scheduler.completed - scheduler.failed} of {scheduler.total_tasks} host/port combinations "
+          f"(~{scheduler.throughput():.0f} probes/s).")
+    print(f"Found {len(results)} open port(s).")
+
+    if scheduler.failed:
+        print(f"{scheduler.failed} probe(s) failed with errors:")
+        for error, count in sorted(scheduler.errors.items(), key=lambda item: -item[1]):
+            print(f"  {count} x {error}")
+
+    if scheduler.expired or scheduler.cancelled() or scheduler.failed:
+        uncovered = scheduler.uncovered_blocks()
+        if uncovered:
+            if scheduler.cancelled():
+                reason = "Scan cancelled"
+            elif scheduler.expired:
+                reason = "Deadline reached"
+            else:
+                reason = "Some probes failed"
+            print(f"{reason}. {len(uncovered)} host(s) have ports that were not covered:")
+            for ip, blocks in uncovered.items():
+                print(f"  {ip}: {blocks}")
     
-    return all_results
+    return results
 
 # --- Reporting Functions ---
 
@@ -518,6 +748,40 @@ def configure_threads(config):
             print("[ERROR] Invalid thread count. Please enter a number.")
     return config
 
+def configure_deadline(config):
+    """Handles interactive input for setting the scan deadline (time budget)."""
+    print("\n--- Configure Scan Deadline ---")
+    print("A deadline stops the scan cleanly after the given number of seconds, scanning likely-open")
+    print("ports and live hosts first and reporting the host/port blocks that were not covered.")
+    while True:
+        current = config['deadline'] or 0
+        deadline_raw = input(f"Enter deadline in seconds (0 = no deadline) [{current}]: ").strip() or str(current)
+        try:
+            deadline = float(deadline_raw)
+            if deadline >= 0:
+                config['deadline'] = deadline or None
+                print(f"[SUCCESS] Deadline set to {format_deadline(config['deadline'])}.")
+                break
+            else:
+                print("[ERROR] Deadline cannot be negative.")
+        except ValueError:
+            print("[ERROR] Invalid deadline. Please enter a number of seconds.")
+    return config
+
+def format_deadline(deadline):
+    """Returns a human-readable deadline for menus."""
+    return f"{deadline:g}s" if deadline is not None else "None"
+
+def positive_seconds(value):
+    """argparse type for --deadline: a number of seconds greater than zero."""
+    try:
+        seconds = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number of seconds: {value!r}")
+    if not seconds > 0: # also rejects nan
+        raise argparse.ArgumentTypeError(f"deadline must be greater than 0 seconds, got {value}")
+    return seconds
+
 def configure_scan(config):
     """Handles interactive input for setting scan parameters."""
     while True:
@@ -525,13 +789,15 @@ def configure_scan(config):
         print(f"A. Target: {config['target']} ({len(config.get('target_ip_list', []))} hosts)")
         print(f"B. Ports: {config['ports_raw']} ({len(config['ports'])} total)")
         print(f"C. Threads: {config['threads']}")
+        print(f"D. Deadline: {format_deadline(config['deadline'])}")
         print("-" * 30)
         print("1: Configure Target (A)")
         print("2: Configure Ports (B)")
         print("3: Configure Threads (C)")
-        print("4: Back to Main Menu")
+        print("4: Configure Deadline (D)")
+        print("5: Back to Main Menu")
         
-        choice = input("Enter your choice (1-4): ").strip()
+        choice = input("Enter your choice (1-5): ").strip()
 
         if choice == '1':
             config = configure_target(config)
@@ -540,6 +806,8 @@ def configure_scan(config):
         elif choice == '3':
             config = configure_threads(config)
         elif choice == '4':
+            config = configure_deadline(config)
+        elif choice == '5':
             print("[INFO] Returning to Main Menu.")
             break
         else:
@@ -568,7 +836,7 @@ def handle_export(results):
     export_report(results, formats, filename)
 
 
-def interactive_scan_tool():
+def interactive_scan_tool(deadline=None):
     """Main function for the interactive port scanning tool."""
     # Initial state
     config = {
@@ -576,7 +844,8 @@ def interactive_scan_tool():
         'target_ip_list': ['127.0.0.1'],
         'ports': parse_ports(DEFAULT_PORTS),
         'ports_raw': DEFAULT_PORTS,
-        'threads': DEFAULT_THREADS
+        'threads': DEFAULT_THREADS,
+        'deadline': deadline
     }
     current_results = []
     
@@ -591,6 +860,7 @@ def interactive_scan_tool():
         print(f"Target: {config['target']} ({len(config.get('target_ip_list', []))} hosts)")
         print(f"Ports: {config['ports_raw']} ({len(config['ports'])} total)")
         print(f"Threads: {config['threads']}")
+        print(f"Deadline: {format_deadline(config['deadline'])}")
         print(f"Last Scan Found: {len(current_results)} open port(s)")
         print("-" * 30)
 
@@ -614,7 +884,8 @@ def interactive_scan_tool():
             current_results = run_scan(
                 config['target_ip_list'], 
                 config['ports'], 
-                config['threads']
+                config['threads'],
+                config['deadline']
             )
 
         elif choice == '3':
@@ -632,7 +903,12 @@ def interactive_scan_tool():
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PyScan - interactive multi-threaded port scanner")
+    parser.add_argument("--deadline", type=positive_seconds, default=None,
+                        help="Time budget in seconds; the scan stops cleanly when it runs out (can also be set from the menu)")
+    args = parser.parse_args()
+
     # Set a custom global socket timeout before execution starts
     socket.setdefaulttimeout(TIMEOUT) 
     # Start the interactive tool instead of running a one-off scan
-    interactive_scan_tool()
+    interactive_scan_tool(deadline=args.deadline)
@@ -14,29 +14,110 @@ Install:
 """
 import argparse
 import base64
+import hashlib
+import heapq
 import json
+import math
+import multiprocessing
 import os
+import queue
 import re
+import shutil
+import sqlite3
+import tempfile
 import threading
+import time
 import uuid
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from html import escape
-from urllib.parse import urljoin, urlparse, parse_qs, urlencode, urlunparse
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse, parse_qs, parse_qsl, unquote_plus, urlencode, urlunparse
+from xml.etree.ElementTree import ParseError, XMLPullParser
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:  # optional C-backed parser for --link-extractor lxml
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
 
 # ----- Configurable payloads/signatures/heuristics -----
 BASE_MARKER = "SECSCAN"               # base marker for unique tokens
 SQLI_PAYLOADS = ["' OR '1'='1", '" OR "1"="1"', "' OR 1=1 -- "]
+# (dbms, signature): plain strings match case-insensitively, re.compile()d entries as regexes
 SQL_ERRORS = [
-    "you have an error in your sql syntax",
-    "warning: mysql",
-    "unclosed quotation mark after the character string",
-    "quoted string not properly terminated",
+    ("MySQL", "you have an error in your sql syntax"),
+    ("MySQL", "warning: mysql"),
+    ("MySQL", "mysql_fetch_array()"),
+    ("MySQL", "mysql_num_rows()"),
+    ("MySQL", "mysqli_sql_exception"),
+    ("MySQL", "com.mysql.jdbc"),
+    ("MySQL", "mysql server version for the right syntax"),
+    ("MariaDB", "check the manual that corresponds to your mariadb server version"),
+    ("PostgreSQL", "pg_query()"),
+    ("PostgreSQL", "pg_exec()"),
+    ("PostgreSQL", "unterminated quoted string at or near"),
+    ("PostgreSQL", "org.postgresql.util.psqlexception"),
+    ("PostgreSQL", re.compile(r"PostgreSQL.{0,40}ERROR")),
+    ("PostgreSQL", re.compile(r"ERROR:\s+syntax error at or near")),
+    ("MSSQL", "unclosed quotation mark after the character string"),
+    ("MSSQL", "microsoft ole db provider for sql server"),
+    ("MSSQL", "microsoft sql native client error"),
+    ("MSSQL", "incorrect syntax near"),
+    ("MSSQL", "system.data.sqlclient.sqlexception"),
+    ("MSSQL", "[sql server]"),
+    ("MSSQL", "odbc sql server driver"),
+    ("Oracle", "quoted string not properly terminated"),
+    ("Oracle", "sql command not properly ended"),
+    ("Oracle", "oracle.jdbc.driver"),
+    ("Oracle", re.compile(r"\bORA-\d{5}")),
+    ("SQLite", "sqlite3.operationalerror"),
+    ("SQLite", "sqlite_error"),
+    ("SQLite", "unrecognized token:"),
+    ("SQLite", "sqlite/jdbcdriver"),
+    ("SQLite", "sqlite.exception"),
+    ("SQLite", "system.data.sqlite.sqliteexception"),
+    ("DB2", "cli driver"),
+    ("DB2", "db2 sql error"),
+    ("DB2", re.compile(r"\bSQLCODE[=:\s]+-?\d+")),
+    ("Informix", "com.informix.jdbc"),
+    ("Informix", re.compile(r"Exception.{0,40}Informix")),
+    ("Sybase", "sybase message"),
+    ("Sybase", re.compile(r"Sybase.{0,40}Server message")),
+    ("Generic", "sqlstate["),
+    ("Generic", "pdoexception"),
+    ("Generic", "jdbc.sqlexception"),
+    ("Generic", re.compile(r"\[ODBC[^\]]*\]")),
 ]
 OPEN_REDIRECT_MARKER = "http://example.com/"
+REQUEST_TIMEOUT = 12                  # default per-request timeout (seconds), see --timeout
+THROTTLE_STATUSES = {429, 503}        # responses that mean "slow down"
+RETRY_METHODS = {"GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE"}  # idempotent: safe to resend when throttled
+THROTTLE_BACKOFF = 1.0                # first pause after a 429/503 without Retry-After (seconds), doubles per repeat
+MAX_BODY_BYTES = 2 * 1024 * 1024      # per-response body cap, see --max-body-kb
+SCAN_QUEUE_PER_WORKER = 4             # crawl -> scan queue depth per scan thread (backpressure)
+SITEMAP_MAX_DOCUMENTS = 50            # sitemap / sitemap-index documents read per domain, see --sitemaps
+SITEMAP_MAX_URLS = 50000              # crawl seeds taken from sitemaps per domain
+# binary / media content types whose bodies the crawler never downloads (no links in them);
+# check responses are always read (up to the body cap), a JSONP or vendor JSON body may reflect input
+SKIP_BODY_TYPES = ("image/", "audio/", "video/", "font/", "application/octet-stream", "application/pdf",
+                   "application/zip", "application/gzip", "application/x-gzip", "application/x-tar",
+                   "application/x-7z-compressed", "application/x-rar-compressed", "application/x-msdownload",
+                   "application/x-shockwave-flash", "application/java-archive", "application/wasm",
+                   "application/msword", "application/vnd.ms-", "application/vnd.openxmlformats-officedocument.",
+                   "application/vnd.oasis.opendocument.", "application/vnd.android.package-archive")
+
+LINK_TAGS = ("a", "form", "link", "script")   # tags whose href/action the crawler follows
+FORM_FIELD_TAGS = ("input", "textarea", "select")  # named controls submitted with their form
+UNSUBMITTED_INPUT_TYPES = {"submit", "button", "reset", "image", "file"}
 
 SUSPICIOUS_PARAM_NAMES = {"q", "query", "search", "term", "s", "callback", "return", "url", "next", "redirect"}
 
@@ -44,110 +125,1893 @@ SUSPICIOUS_PARAM_NAMES = {"q", "query", "search", "term", "s", "callback", "retu
 # ----- Utilities -----
 
 
+def _caseless(ch):
+    # explicit [aA] classes: faster than a global IGNORECASE flag, though slower
+    # than plain literals, which let the regex engine skip to candidate characters
+    lower, upper = ch.lower(), ch.upper()
+    if lower == upper or len(upper) != 1:
+        return re.escape(ch)
+    return "[" + re.escape(lower) + re.escape(upper) + "]"
+
+
+def _trie_regex(words, caseless=True):
+    """
+    Regex source matching any of `words` (given lower-cased), case-insensitively
+    unless caseless is False; shared prefixes are factored so each is tested once.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        end = node.get("") is True
+        branches = [(_caseless(ch) if caseless else re.escape(ch)) + build(child)
+                    for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class SignatureMatcher:
+    """
+    Matches (tag, signature) pairs - plain strings and compiled regexes - case-insensitively.
+    Literals are compiled into one prefix-factored pattern run over the lower-cased
+    body, so it is scanned once regardless of their number; each regex is searched
+    on its own, keeping the regex engine's fast scans.
+    """
+
+    def __init__(self, signatures):
+        self.literals = {}  # lower-cased literal -> (tag, literal)
+        self.regexes = []   # (tag, pattern source, compiled case-insensitive pattern)
+        for tag, sig in signatures:
+            if isinstance(sig, str):
+                self.literals[sig.lower()] = (tag, sig)
+            else:
+                self.regexes.append((tag, sig.pattern, re.compile(sig.pattern, sig.flags | re.I | re.DOTALL)))
+        self.pattern = self.caseless = None
+        if self.literals:
+            self.pattern = re.compile(_trie_regex(self.literals, caseless=False))
+            # for bodies whose lower-casing changes their length (and so the offsets)
+            self.caseless = re.compile(_trie_regex(self.literals))
+
+    def search_all(self, text):
+        """
+        Return [{"signature", "tag", "offset", "text"}] with the first occurrence of
+        every signature found in text, in order of appearance.
+        """
+        found = []
+        if not text:
+            return found
+        seen = set()
+        pattern, lowered = self.pattern, text.lower()
+        if len(lowered) != len(text):
+            pattern, lowered = self.caseless, text
+        pos = 0
+        while pattern is not None:
+            m = pattern.search(lowered, pos)
+            if m is None:
+                break
+            # the pattern takes the longest literal at this offset; the shorter
+            # literals starting here are its prefixes
+            matched = text[m.start():m.end()]
+            for end in range(1, len(matched) + 1):
+                entry = self.literals.get(matched[:end].lower())
+                if entry is not None and entry[1] not in seen:
+                    seen.add(entry[1])
+                    found.append({"signature": entry[1], "tag": entry[0], "offset": m.start(),
+                                  "text": matched[:end]})
+            pos = m.start() + 1  # overlapping matches may start inside this one
+        for tag, sig, regex in self.regexes:
+            m = regex.search(text)
+            if m is not None:
+                found.append({"signature": sig, "tag": tag, "offset": m.start(), "text": m.group()})
+        found.sort(key=lambda hit: hit["offset"])
+        return found
+
+
+SQL_ERROR_MATCHER = SignatureMatcher(SQL_ERRORS)
+
+
+def normalize_base_url(domain):
+    return domain if domain.startswith(("http://", "https://")) else "http://" + domain
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_PERCENT_RE = re.compile(r"%([0-9A-Fa-f]{2})")
+
+
+def _normalize_percent(text):
+    # decode escapes of unreserved characters, upper-case the remaining escapes
+    def fix(m):
+        ch = chr(int(m.group(1), 16))
+        return ch if ch in _UNRESERVED else "%" + m.group(1).upper()
+    return _PERCENT_RE.sub(fix, text)
+
+
+def canonicalize_url(url):
+    """
+    Canonical form used to deduplicate URLs: lower-case scheme and host, no
+    default port, normalized percent-encoding, query parameters sorted by name
+    (repeated names keep their order), no fragment. Query parameters are
+    reordered but never re-encoded ("a/b", "%20" vs "+" and valueless "?flag"
+    stay as written), because canonical URLs are also what gets requested.
+    Raises ValueError on malformed URLs (e.g. a non-numeric port).
+    """
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = parsed.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    port = parsed.port
+    netloc = host if port is None or port == DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    if parsed.username is not None:
+        userinfo = parsed.username + (f":{parsed.password}" if parsed.password is not None else "")
+        netloc = f"{userinfo}@{netloc}"
+    path = _normalize_percent(parsed.path) or "/"
+    params = sorted((_normalize_percent(p) for p in parsed.query.split("&") if p), key=_query_name)
+    return urlunparse((scheme, netloc, path, parsed.params, "&".join(params), ""))
+
+
+def _query_name(param):
+    # decoded name of one raw "name=value" query parameter
+    return unquote_plus(param.partition("=")[0])
+
+
+def form_endpoint(form):
+    """
+    Scan endpoint for submitting a form ({"action", "method", "fields"}) with its
+    default values, or None when it has no named fields. GET forms submit in the
+    query string, so they become the action URL with the fields merged in; POST
+    forms become "POST <action> <urlencoded body>".
+    """
+    fields = form.get("fields") or {}
+    if not fields:
+        return None
+    if form.get("method") != "post":
+        parsed = urlparse(form["action"])
+        # the action's own parameters stay as written, the fields are encoded like a browser submission
+        kept = [p for p in parsed.query.split("&") if p and _query_name(p) not in fields]
+        query = "&".join(kept + [urlencode(fields)])
+        return canonicalize_url(urlunparse(parsed._replace(query=query)))
+    return f"POST {form['action']} {urlencode(sorted(fields.items()))}"
+
+
+def split_endpoint(endpoint):
+    """(method, url, {field: value} body or None) of a plain URL or a form_endpoint."""
+    if endpoint.startswith("POST "):
+        url, _, body = endpoint[5:].rpartition(" ")
+        return "POST", url, dict(parse_qsl(body, keep_blank_values=True))
+    return "GET", endpoint, None
+
+
+def join_endpoint(method, url, body=None):
+    """Inverse of split_endpoint."""
+    if method == "POST":
+        return f"POST {url} {urlencode(sorted(body.items()))}"
+    return url
+
+
+def endpoint_template(url):
+    """Cluster key for equivalent endpoints: the URL's path plus its sorted parameter names."""
+    method, url, body = split_endpoint(url)
+    if body is not None:
+        return f"POST {endpoint_template(url)} {'&'.join(sorted(body))}"
+    parsed = urlparse(url)
+    names = sorted({k for k, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    return urlunparse(parsed._replace(query="&".join(names), fragment=""))
+
+
+class EndpointSelector:
+    """
+    Streaming form of select_endpoints: admit(url) is True for the first
+    `per_template` endpoints seen per endpoint_template (0 admits all) and
+    counts the rest in `skipped` ({template: number of skipped endpoints}).
+    reserve(url) holds a slot for url ahead of the URLs that arrive first.
+    """
+
+    def __init__(self, per_template):
+        self.per_template = per_template
+        self.counts = {}
+        self.skipped = {}
+        self.reserved = set()
+
+    def reserve(self, url):
+        """Take a slot of url's template for url; False if the template is already full."""
+        if self.per_template <= 0:
+            return True
+        template = endpoint_template(url)
+        if self.counts.get(template, 0) >= self.per_template:
+            return False
+        self.counts[template] = self.counts.get(template, 0) + 1
+        self.reserved.add(url)
+        return True
+
+    def admit(self, url):
+        if self.per_template <= 0:
+            return True
+        if url in self.reserved:
+            self.reserved.discard(url)
+            return True
+        template = endpoint_template(url)
+        self.counts[template] = self.counts.get(template, 0) + 1
+        if self.counts[template] <= self.per_template:
+            return True
+        self.skipped[template] = self.skipped.get(template, 0) + 1
+        return False
+
+
+def select_endpoints(endpoints, per_template):
+    """
+    Keep at most `per_template` endpoints per endpoint_template (0 keeps all).
+    Returns (selected endpoints, {template: number of skipped endpoints}).
+    """
+    selector = EndpointSelector(per_template)
+    selected = [url for url in endpoints if selector.admit(url)]
+    return selected, selector.skipped
+
+
+_WORD_RE = re.compile(r"\w+")
+SIMHASH_SAMPLE = 2048  # shingles per page that enter the sketch
+
+
+def simhash(text):
+    """
+    64-bit simhash of a page over its 3-word shingles (tags and attributes count
+    as words). Only the SIMHASH_SAMPLE shingles with the smallest CRC32 enter
+    the sketch, a consistent sample that keeps large pages cheap. Near-identical
+    pages differ in only a few bits. Returns None for pages without words.
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return None
+    shingles = {" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))}
+    sample = heapq.nsmallest(SIMHASH_SAMPLE, shingles, key=lambda sh: zlib.crc32(sh.encode("utf-8")))
+    hashes = [int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big") for sh in sample]
+    sketch = 0
+    half = len(hashes) / 2
+    for bit in range(64):
+        mask = 1 << bit
+        if sum(1 for h in hashes if h & mask) > half:
+            sketch |= mask
+    return sketch
+
+
+class NearDuplicateIndex:
+    """
+    Clusters crawled pages of one endpoint template (novelty_key) by exact
+    content hash or by simhash within `max_distance` bits and admits at most
+    `cap` endpoints per cluster; pages of different templates never share a
+    cluster, as their parameters may be handled differently.
+    Sketches are indexed by 4 bands of 16 bits; two sketches within 3 bits
+    always share a band, so a lookup only compares a handful of candidates.
+    Pages that match a soft-404 probe page (add_soft_404) start clusters
+    labelled "soft-404" instead of "near-duplicate". reserve() holds a slot for
+    a URL whose content hash is known in advance (last run's pick), ahead of
+    the URLs that arrive first.
+    """
+
+    BANDS = 4
+    EXAMPLES = 5
+
+    def __init__(self, cap=3, max_distance=3):
+        self.cap = cap
+        self.max_distance = min(max_distance, self.BANDS - 1)
+        self.clusters = []
+        self.by_hash = {}  # (template, content hash) -> cluster
+        self.bands = [{} for _ in range(self.BANDS)]
+        self.soft_404 = []  # (content hash, sketch) of the soft-404 probe pages
+
+    def _bands(self, sketch):
+        return [(sketch >> (16 * i)) & 0xFFFF for i in range(self.BANDS)]
+
+    def _near(self, a, b):
+        return bin(a ^ b).count("1") <= self.max_distance
+
+    def _find(self, template, fingerprint, sketch):
+        cluster = self.by_hash.get((template, fingerprint))
+        if cluster is not None:
+            return cluster
+        for band, value in zip(self.bands, self._bands(sketch)):
+            for candidate in band.get(value, ()):
+                if candidate["template"] == template and self._near(candidate["sketch"], sketch):
+                    return candidate
+        return None
+
+    def _new_cluster(self, url, template, fingerprint, sketch, kind):
+        cluster = {"kind": kind, "representative": url, "template": template, "sketch": None,
+                   "members": 0, "scanned": 0, "skipped": 0, "examples": [], "reserved": set()}
+        self.clusters.append(cluster)
+        self.by_hash[(template, fingerprint)] = cluster
+        self._index(cluster, sketch)
+        return cluster
+
+    def _index(self, cluster, sketch):
+        # reserved clusters are only known by content hash until a member with a sketch arrives
+        if sketch is None or cluster["sketch"] is not None:
+            return
+        cluster["sketch"] = sketch
+        for band, value in zip(self.bands, self._bands(sketch)):
+            band.setdefault(value, []).append(cluster)
+
+    def reserve(self, url, fingerprint):
+        """Take a slot of the (template, content hash) cluster for url; False if it is already full."""
+        if fingerprint is None:
+            return True
+        template = novelty_key(url)
+        cluster = self.by_hash.get((template, fingerprint))
+        if cluster is None:
+            cluster = self._new_cluster(url, template, fingerprint, None, "near-duplicate")
+        if cluster["scanned"] >= self.cap:
+            return False
+        cluster["scanned"] += 1
+        cluster["reserved"].add(url)
+        return True
+
+    def add_soft_404(self, fingerprint, sketch):
+        if sketch is not None:
+            self.soft_404.append((fingerprint, sketch))
+
+    def admit(self, url, fingerprint, sketch):
+        """True if the endpoint should be scanned. Pages without a sketch (non-HTML) always are."""
+        if sketch is None:
+            return True
+        template = novelty_key(url)
+        cluster = self._find(template, fingerprint, sketch)
+        if cluster is None:
+            soft_404 = any(fingerprint == fp or self._near(sketch, sk) for fp, sk in self.soft_404)
+            cluster = self._new_cluster(url, template, fingerprint, sketch,
+                                        "soft-404" if soft_404 else "near-duplicate")
+        self._index(cluster, sketch)
+        self.by_hash.setdefault((template, fingerprint), cluster)
+        cluster["members"] += 1
+        if url in cluster["reserved"]:
+            cluster["reserved"].discard(url)
+            return True
+        if cluster["scanned"] < self.cap:
+            cluster["scanned"] += 1
+            return True
+        cluster["skipped"] += 1
+        if len(cluster["examples"]) < self.EXAMPLES:
+            cluster["examples"].append(url)
+        return False
+
+    def collapsed(self):
+        """Clusters that had endpoints skipped, as report records."""
+        return [{k: c[k] for k in ("kind", "representative", "members", "skipped", "examples")}
+                for c in self.clusters if c["skipped"]]
+
+
 def same_origin(u1, u2):
     p1 = urlparse(u1)
     p2 = urlparse(u2)
     return p1.scheme == p2.scheme and p1.netloc == p2.netloc
 
 
+class PoolStats:
+    """Thread-safe counters for HTTP connection reuse across all scanner threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0  # pool misses: TCP (+TLS) handshakes
+        self.discarded = 0        # connections closed because the pool was full
+
+    def incr(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def summary(self):
+        reused = max(0, self.requests - self.new_connections)
+        rate = 100.0 * reused / self.requests if self.requests else 0.0
+        return (f"{self.requests} requests, {self.new_connections} new connections, "
+                f"{reused} reused ({rate:.0f}% pool hits), {self.discarded} discarded")
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class HostRateLimiter:
+    """
+    Per-host token bucket shared by the crawler and every check. The rate adapts
+    to each target: it doubles about every second ("slow start") until the host
+    first pushes back, then grows by about `increase` req/s every second while
+    the host answers quickly. It halves on 429/503 or connection errors; a 429/503
+    also pauses the host, for Retry-After when given and otherwise for
+    THROTTLE_BACKOFF seconds, doubled for each further throttle before a normal
+    reply. It eases off when latency climbs well above the host's baseline
+    latency. The baseline follows drops at once but
+    rises slowly towards the current latency, so a few fast early replies
+    (robots.txt, 304s, redirects) do not make normal pages look like overload
+    for the rest of the scan; only a latency climb faster than the drift does.
+    """
+
+    MAX_PAUSE = 120.0       # cap on Retry-After pauses (seconds)
+    SLOW_FACTOR = 2.0       # latency this many times the host's baseline counts as overload
+    BASELINE_WINDOW = 5.0   # time constant (seconds) of the baseline's rise towards the current latency
+
+    def __init__(self, initial_rate=10.0, max_rate=50.0, min_rate=0.5, increase=1.0):
+        self.initial_rate = initial_rate
+        self.max_rate = max(max_rate, initial_rate)
+        self.min_rate = min(min_rate, initial_rate)
+        self.increase = increase
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def _bucket(self, host):
+        bucket = self.hosts.get(host)
+        if bucket is None:
+            bucket = self.hosts[host] = {
+                "rate": self.initial_rate, "tokens": 1.0, "last": time.monotonic(),
+                "paused_until": 0.0, "last_decrease": 0.0, "latency": None, "baseline": None, "observed": 0.0,
+                "slow_start": True, "throttled": 0,
+            }
+        return bucket
+
+    def acquire(self, host):
+        """Block until a request to host is allowed."""
+        while True:
+            with self.lock:
+                b = self._bucket(host)
+                now = time.monotonic()
+                if now < b["paused_until"]:
+                    wait_for = b["paused_until"] - now
+                else:
+                    # allow a burst of up to one second's worth of requests
+                    b["tokens"] = min(max(1.0, b["rate"]), b["tokens"] + (now - b["last"]) * b["rate"])
+                    b["last"] = now
+                    if b["tokens"] >= 1.0:
+                        b["tokens"] -= 1.0
+                        return
+                    wait_for = (1.0 - b["tokens"]) / b["rate"]
+            time.sleep(wait_for)
+
+    def observe(self, host, latency, status=None, retry_after=None):
+        """Feed back one finished request (status None = connection error/timeout)."""
+        with self.lock:
+            b = self._bucket(host)
+            now = time.monotonic()
+            if status is None or status in THROTTLE_STATUSES:
+                if retry_after:
+                    b["paused_until"] = max(b["paused_until"], now + min(retry_after, self.MAX_PAUSE))
+                elif status is not None and now >= b["paused_until"]:
+                    # replies already in flight during a pause do not lengthen the next one
+                    pause = min(THROTTLE_BACKOFF * 2 ** b["throttled"], self.MAX_PAUSE)
+                    b["throttled"] += 1
+                    b["paused_until"] = now + pause
+                self._decrease(b, now, 0.5)
+                return
+            b["throttled"] = 0
+            b["latency"] = latency if b["latency"] is None else 0.8 * b["latency"] + 0.2 * latency
+            if b["baseline"] is None or b["latency"] < b["baseline"]:
+                b["baseline"] = b["latency"]
+            else:
+                # time-based, so the drift does not speed up with the request rate
+                weight = 1.0 - math.exp(-(now - b["observed"]) / self.BASELINE_WINDOW)
+                b["baseline"] += weight * (b["latency"] - b["baseline"])
+            b["observed"] = now
+            if b["latency"] > self.SLOW_FACTOR * b["baseline"] and b["latency"] > 0.2:
+                self._decrease(b, now, 0.8)
+            elif b["slow_start"]:
+                b["rate"] = min(self.max_rate, b["rate"] + 1.0)
+            else:
+                b["rate"] = min(self.max_rate, b["rate"] + self.increase / b["rate"])
+
+    def _decrease(self, b, now, factor):
+        # at most one decrease per second so a burst of slow/throttled replies counts once
+        b["slow_start"] = False
+        if now - b["last_decrease"] >= 1.0:
+            b["rate"] = max(self.min_rate, b["rate"] * factor)
+            b["last_decrease"] = now
+
+    def rate(self, host):
+        with self.lock:
+            return self._bucket(host)["rate"]
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose per-host pools count requests, new connections and discards.
+    Every request (including redirect hops) passes the optional HostRateLimiter.
+    """
+
+    def __init__(self, stats, rate_limiter=None, **kwargs):
+        self.stats = stats
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self.stats
+
+        class CountingMixin:
+            def _new_conn(self):
+                stats.incr("new_connections")
+                return super()._new_conn()
+
+            def _put_conn(self, conn):
+                if self.pool is not None and self.pool.full():
+                    stats.incr("discarded")
+                return super()._put_conn(conn)
+
+        class CountingHTTPConnectionPool(CountingMixin, HTTPConnectionPool):
+            pass
+
+        class CountingHTTPSConnectionPool(CountingMixin, HTTPSConnectionPool):
+            pass
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.incr("requests")
+        if self.rate_limiter is None:
+            return super().send(request, **kwargs)
+        host = urlparse(request.url).netloc.lower()
+        self.rate_limiter.acquire(host)
+        start = time.monotonic()
+        try:
+            resp = super().send(request, **kwargs)
+        except requests.RequestException:
+            self.rate_limiter.observe(host, time.monotonic() - start)
+            raise
+        self.rate_limiter.observe(host, time.monotonic() - start, resp.status_code,
+                                  parse_retry_after(resp.headers.get("Retry-After")))
+        return resp
+
+
+class ScannerSession(requests.Session):
+    """
+    requests.Session with a default timeout that retries throttled (429/503)
+    responses of idempotent requests (RETRY_METHODS); a form POST is sent once.
+    With a HostRateLimiter on the adapter the limiter already delays the retry
+    until the host's Retry-After pause is over; without one (--rate 0) the
+    session sleeps for Retry-After itself, or backs off exponentially.
+
+    Bodies are streamed and cut at max_body_bytes, so r.content / r.text stay
+    bounded; with skip_binary=True (crawler fetches) the headers are checked
+    first and bodies of SKIP_BODY_TYPES are not downloaded at all. Such
+    responses carry r.truncated or r.body_skipped. Callers passing stream=True
+    get the raw streaming response.
+    """
+
+    def __init__(self, timeout=REQUEST_TIMEOUT, throttle_retries=2, max_body_bytes=MAX_BODY_BYTES):
+        super().__init__()
+        self.timeout = timeout
+        self.throttle_retries = throttle_retries
+        self.max_body_bytes = max_body_bytes
+        self.rate_limiter = None
+
+    def request(self, method, url, skip_binary=False, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        raw_stream = kwargs.pop("stream", False)
+        retries = self.throttle_retries if method.upper() in RETRY_METHODS else 0
+        for attempt in range(retries + 1):
+            resp = super().request(method, url, stream=True, **kwargs)
+            if resp.status_code not in THROTTLE_STATUSES or attempt == retries:
+                if not raw_stream:
+                    self.read_bounded(resp, skip_binary)
+                return resp
+            resp.close()
+            if self.rate_limiter is None:  # otherwise the limiter pauses the host
+                wait = parse_retry_after(resp.headers.get("Retry-After"))
+                if wait is None:
+                    wait = THROTTLE_BACKOFF * 2 ** attempt
+                time.sleep(min(wait, HostRateLimiter.MAX_PAUSE))
+
+    def read_bounded(self, resp, skip_binary=False):
+        resp.body_skipped = False
+        resp.truncated = False
+        content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if skip_binary and content_type.startswith(SKIP_BODY_TYPES):
+            resp.body_skipped = True
+            resp._content = b""
+            resp.close()
+            return
+        chunks = []
+        size = 0
+        try:
+            for chunk in resp.iter_content(64 * 1024):
+                room = self.max_body_bytes - size
+                if len(chunk) > room:
+                    chunks.append(chunk[:room])
+                    resp.truncated = True
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        finally:
+            resp._content = b"".join(chunks)
+            resp._content_consumed = True
+            if resp.truncated:
+                resp.close()  # the rest of the body is not read; drop the connection
+
+
+def build_session(pool_maxsize=10, pool_connections=10, timeout=REQUEST_TIMEOUT, rate_limiter=None,
+                  max_body_bytes=MAX_BODY_BYTES):
+    """
+    Session shared by the crawler and all scanner threads. pool_maxsize is the
+    number of keep-alive connections kept per host and should cover every thread
+    that can talk to one host at once; pool_connections is how many host pools
+    are kept. Pool statistics are available as session.pool_stats.
+    """
+    session = ScannerSession(timeout=timeout, max_body_bytes=max_body_bytes)
+    session.pool_stats = PoolStats()
+    session.rate_limiter = rate_limiter
+    adapter = PooledAdapter(session.pool_stats, rate_limiter=rate_limiter,
+                            pool_connections=max(1, pool_connections), pool_maxsize=max(1, pool_maxsize))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def safe_get(session, url, **kw):
     try:
-        return session.get(url, timeout=12, allow_redirects=True, **kw)
+        return session.get(url, allow_redirects=True, **kw)
     except requests.RequestException:
         return None
 
 
+def send_endpoint(session, endpoint, allow_redirects=True):
+    """Request an endpoint: GET for URLs, a form POST for "POST ..." endpoints."""
+    method, url, body = split_endpoint(endpoint)
+    if body is not None:
+        return session.post(url, data=body, allow_redirects=allow_redirects)
+    return session.get(url, allow_redirects=allow_redirects)
+
+
+class BaselineCache:
+    """
+    Scan-scoped LRU cache of baseline (unmodified) page bodies, keyed by canonical URL.
+    The crawler seeds it with the pages it fetched and every check shares it, so an
+    endpoint's original page is fetched at most once per scan.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max(1, max_entries)
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url):
+        method, target, body = split_endpoint(url)
+        try:
+            return join_endpoint(method, canonicalize_url(target), body)
+        except ValueError:
+            return url
+
+    def get(self, url):
+        key = self.key(url)
+        with self.lock:
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+            return body
+
+    def put(self, url, body):
+        key = self.key(url)
+        with self.lock:
+            self.entries[key] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def fetch(self, session, url):
+        """Return the baseline body for url, fetching it on a miss ("" if the fetch fails)."""
+        body = self.get(url)
+        if body is not None:
+            with self.lock:
+                self.hits += 1
+            return body
+        with self.lock:
+            self.misses += 1
+        try:
+            # a POST form endpoint's baseline is the submission with its default values
+            resp = send_endpoint(session, url)
+        except requests.RequestException:
+            resp = None
+        body = resp.text if resp is not None else ""
+        self.put(url, body)
+        return body
+
+
+class CrawlCache:
+    """
+    Persistent (sqlite) cache of the crawler's page fetches, keyed by canonical URL.
+    It keeps each page's validators (ETag / Last-Modified), content hash and
+    extracted links, so a later run can send a conditional request and, on
+    304 Not Modified, reuse the links without downloading or parsing the page.
+    Only the crawler's plain GETs go through it; injection requests never do.
+    """
+
+    COMMIT_EVERY = 50
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "content_type TEXT, body_hash TEXT, links TEXT, fetched_at TEXT)")
+        for column in ("simhash", "forms"):
+            try:
+                # caches written by older versions lack the later columns
+                self.db.execute(f"ALTER TABLE pages ADD COLUMN {column} TEXT")
+            except sqlite3.OperationalError:
+                pass
+        self.pending_writes = 0
+        self.revalidated = 0  # 304 answers
+        self.refreshed = 0    # full fetches stored
+
+    def lookup(self, url):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, last_modified, content_type, body_hash, links, fetched_at, simhash, forms "
+                "FROM pages WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_type, body_hash, links, fetched_at, sketch, forms = row
+        return {"etag": etag, "last_modified": last_modified, "content_type": content_type,
+                "body_hash": body_hash, "links": json.loads(links), "fetched_at": fetched_at,
+                "simhash": int(sketch, 16) if sketch else None, "forms": json.loads(forms) if forms else []}
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def mark_revalidated(self):
+        with self.lock:
+            self.revalidated += 1
+
+    def store(self, url, resp, links, body_hash, sketch=None, forms=()):
+        now = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, content_type, body_hash, links, fetched_at, "
+                "simhash, forms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, resp.headers.get("ETag"), resp.headers.get("Last-Modified"),
+                 resp.headers.get("Content-Type", ""), body_hash, json.dumps(sorted(links)), now,
+                 "%016x" % sketch if sketch is not None else None, json.dumps(list(forms))))
+            self.refreshed += 1
+            self.pending_writes += 1
+            if self.pending_writes >= self.COMMIT_EVERY:
+                self.db.commit()
+                self.pending_writes = 0
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ScanJournal:
+    """
+    Append-only NDJSON journal of a multi-domain run (--journal), used by --resume.
+    Records (one JSON object per line, flushed as written):
+      {"type": "frontier", "domain", "visited", "endpoints", "scheduled", "fingerprints", "sketches",
+       "in_flight", "pending"}
+          periodic crawl checkpoint holding only what was added since the previous one,
+          so a long crawl writes each URL about once; load() merges them. visited /
+          endpoints are URLs or, with a compact --crawl-state, url_fingerprint values;
+          fingerprints are (same key, content hash) pairs; scheduled are the
+          (url, depth) pairs pushed to the frontier; in_flight (pages
+          being fetched) and pending (endpoints handed to the scanners but not finished)
+          are complete, the latest one wins
+      {"type": "crawled", "domain", "endpoints", "fingerprints", "skipped", "near_duplicates"}
+          crawl finished, endpoints selected for scanning
+      {"type": "endpoint", "domain", "result"}
+          one finished endpoint scan
+      {"type": "domain_done", "domain", "skipped_equivalent", "carried_forward", "near_duplicates"}
+    Every record but "endpoint" is fsync'd, which also makes the endpoint records
+    before it durable. A torn last line (crash mid-write) is ignored on load.
+    """
+
+    UNSYNCED = {"endpoint"}  # frequent records that ride along with the next fsync
+
+    def __init__(self, path, resume=False):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.state = self.load(path) if resume else {}
+        self.fh = open(path, "a" if resume else "w", encoding="utf-8")
+
+    @staticmethod
+    def load(path):
+        """
+        Replay a journal into {domain: {"frontier", "crawled", "results": {url: result}, "done"}};
+        "frontier" is the merge of the domain's crawl checkpoints.
+        """
+        state = {}
+        try:
+            fh = open(path, "r", encoding="utf-8")
+        except OSError:
+            return state
+        with fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                dom = state.setdefault(rec.get("domain"), {"frontier": None, "crawled": None,
+                                                           "results": {}, "done": None})
+                kind = rec.get("type")
+                if kind == "frontier":
+                    dom["frontier"] = ScanJournal.merge_checkpoint(dom["frontier"], rec)
+                elif kind == "crawled":
+                    dom["crawled"] = rec
+                elif kind == "endpoint":
+                    dom["results"][rec["result"]["url"]] = rec["result"]
+                elif kind == "domain_done":
+                    dom["done"] = rec
+        return state
+
+    @staticmethod
+    def merge_checkpoint(merged, rec):
+        if merged is None:
+            merged = EndpointDiscoverer._no_changes()
+        for key in ("visited", "endpoints", "scheduled", "fingerprints"):
+            merged[key].extend(rec[key])
+        merged["sketches"].update(rec["sketches"])
+        merged["in_flight"] = rec["in_flight"]
+        merged["pending"] = rec["pending"]
+        return merged
+
+    def domain_state(self, domain):
+        return self.state.get(domain)
+
+    def record(self, kind, domain, **fields):
+        line = json.dumps(dict(type=kind, domain=domain, **fields)) + "\n"
+        with self.lock:
+            self.fh.write(line)
+            self.fh.flush()
+            if kind not in self.UNSYNCED:
+                os.fsync(self.fh.fileno())
+
+    def close(self):
+        with self.lock:
+            self.fh.flush()
+            os.fsync(self.fh.fileno())
+            self.fh.close()
+
+
+# ----- Link extraction -----
+# Each extractor returns the raw href/action values of LINK_TAGS in document order
+# and the page's forms with the named fields inside them, from the same pass.
+# "stream" uses the same stdlib tokenizer as BeautifulSoup's html.parser builder
+# but never builds a tree, so it yields the same links at a fraction of the cost.
+
+
+def _form_record(attrs):
+    return {"action": attrs.get("action") or "", "method": (attrs.get("method") or "get").lower(), "fields": {}}
+
+
+def _add_form_field(form, tag, attrs):
+    # controls a plain submission sends: named, and not buttons / file uploads
+    name = attrs.get("name")
+    if not name or (tag == "input" and (attrs.get("type") or "text").lower() in UNSUBMITTED_INPUT_TYPES):
+        return
+    form["fields"].setdefault(name, (attrs.get("value") or "") if tag == "input" else "")
+
+
+class _LinkCollector(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.hrefs = []
+        self.forms = []
+        self.form = None  # the open <form>, receives the fields that follow
+
+    def handle_starttag(self, tag, attrs):
+        if tag in LINK_TAGS:
+            attrs = dict(attrs)
+            href = attrs.get("href") or attrs.get("action")
+            if href:
+                self.hrefs.append(href)
+            if tag == "form":
+                self.form = _form_record(attrs)
+                self.forms.append(self.form)
+        elif tag in FORM_FIELD_TAGS and self.form is not None:
+            _add_form_field(self.form, tag, dict(attrs))
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self.form = None
+
+
+class _LxmlLinkTarget:
+    """lxml parser target: receives start/end-tag events from libxml2, no tree is built."""
+
+    def __init__(self):
+        self.hrefs = []
+        self.forms = []
+        self.form = None
+
+    def start(self, tag, attrib):
+        if tag in LINK_TAGS:
+            href = attrib.get("href") or attrib.get("action")
+            if href:
+                self.hrefs.append(href)
+            if tag == "form":
+                self.form = _form_record(attrib)
+                self.forms.append(self.form)
+        elif tag in FORM_FIELD_TAGS and self.form is not None:
+            _add_form_field(self.form, tag, attrib)
+
+    def end(self, tag):
+        if tag == "form":
+            self.form = None
+
+    def close(self):
+        return self.hrefs, self.forms
+
+
+def extract_hrefs_stream(html):
+    collector = _LinkCollector()
+    collector.feed(html)
+    collector.close()
+    return collector.hrefs, collector.forms
+
+
+def extract_hrefs_lxml(html):
+    if lxml_etree is None:
+        raise RuntimeError("lxml is not installed")
+    parser = lxml_etree.HTMLParser(target=_LxmlLinkTarget())
+    parser.feed(html)
+    return parser.close()
+
+
+def extract_hrefs_bs4(html):
+    soup = BeautifulSoup(html, "html.parser")
+    hrefs = []
+    forms = []
+    for tag in soup.find_all(list(LINK_TAGS)):
+        href = tag.get("href") or tag.get("action")
+        if href:
+            hrefs.append(href)
+        if tag.name == "form":
+            form = _form_record(tag.attrs)
+            for field in tag.find_all(list(FORM_FIELD_TAGS)):
+                _add_form_field(form, field.name, field.attrs)
+            forms.append(form)
+    return hrefs, forms
+
+
+LINK_EXTRACTORS = {
+    "stream": extract_hrefs_stream,
+    "lxml": extract_hrefs_lxml,
+    "bs4": extract_hrefs_bs4,
+}
+
+
+# ----- Reflection context classification -----
+# One left-to-right pass over the body splits it into markup regions (tag names,
+# attribute names/values, comments, script/style/rcdata text); every marker
+# offset is then assigned to the region it falls in. All patterns below are
+# anchored or use negated classes only, so the cost is linear in body size.
+
+_MARKUP_START_RE = re.compile(r"<(?:(!--)|/?([a-zA-Z][^\s/>]*))")
+_ATTR_RE = re.compile(r"""[\s/]*(?:(>)|([^\s"'<>/=][^\s"'>/=]*)(?:\s*=\s*(?:"([^"]*)"?|'([^']*)'?|([^\s>]*)))?)""")
+_RAW_TEXT_CONTEXTS = {"script": "script", "style": "style", "textarea": "rcdata", "title": "rcdata"}
+_RAW_TEXT_END_RES = {name: re.compile(r"</" + name, re.IGNORECASE) for name in _RAW_TEXT_CONTEXTS}
+
+# most to least dangerous; used to pick one context for a marker reflected several times
+CONTEXT_PRIORITY = ["script", "attribute-unquoted", "attribute-double", "attribute-single", "attribute-name",
+                    "tag", "style", "html", "rcdata", "comment"]
+
+
+def _markup_regions(body):
+    """Yield non-overlapping (start, end, context) regions of body, in document order."""
+    pos = 0
+    n = len(body)
+    while pos < n:
+        m = _MARKUP_START_RE.search(body, pos)
+        if m is None:
+            return
+        if m.group(1):  # <!-- comment -->
+            end = body.find("-->", m.end())
+            end = n if end < 0 else end + 3
+            yield m.start(), end, "comment"
+            pos = end
+            continue
+        yield m.start() + 1, m.end(), "tag"
+        closing = body[m.start() + 1] == "/"
+        name = m.group(2).lower()
+        p = m.end()
+        while p < n:
+            am = _ATTR_RE.match(body, p)
+            if am is None:  # stray quote/'<' inside the tag: step over it
+                p += 1
+                continue
+            p = am.end()
+            if am.group(1):  # '>'
+                break
+            yield am.start(2), am.end(2), "attribute-name"
+            for group, ctx in ((3, "attribute-double"), (4, "attribute-single"), (5, "attribute-unquoted")):
+                if am.group(group) is not None:
+                    yield am.start(group), am.end(group), ctx
+                    break
+        pos = p
+        if not closing and name in _RAW_TEXT_CONTEXTS:
+            end_m = _RAW_TEXT_END_RES[name].search(body, pos)
+            end = n if end_m is None else end_m.start()
+            yield pos, end, _RAW_TEXT_CONTEXTS[name]
+            pos = end
+
+
+def reflection_contexts(body, markers):
+    """
+    Return {marker: [context, ...]} with the context of every occurrence of each
+    marker in body: script, style, rcdata (textarea/title), comment, tag,
+    attribute-name, attribute-double/-single/-unquoted (value quoting) or html
+    (text). Markers that are not reflected map to an empty list.
+    """
+    result = {marker: [] for marker in markers}
+    if not markers or not body:
+        return result
+    marker_re = re.compile("|".join(re.escape(m) for m in sorted(markers, key=len, reverse=True)))
+    hits = [(m.start(), m.group()) for m in marker_re.finditer(body)]
+    if not hits:
+        return result
+    regions = _markup_regions(body)
+    region = next(regions, None)
+    for offset, marker in hits:
+        while region is not None and region[1] <= offset:
+            region = next(regions, None)
+        if region is not None and region[0] <= offset:
+            result[marker].append(region[2])
+        else:
+            result[marker].append("html")
+    return result
+
+
+def strongest_context(contexts):
+    """Pick the most dangerous context out of a marker's occurrences ('unknown' if none)."""
+    if not contexts:
+        return "unknown"
+    return min(contexts, key=CONTEXT_PRIORITY.index)
+
+
+# ----- CPU-bound work on a process pool (--parse-processes) -----
+# Link extraction, SQL error matching and reflection context classification are
+# pure CPU work that serializes on the GIL when run on the I/O threads. With a
+# pool, a thread ships the raw body bytes (plus the declared charset) to a worker
+# process and blocks on the result, which releases the GIL; only the bytes and
+# the compact result (links, matches, contexts) are pickled. Without a pool the
+# same functions run inline on the calling thread.
+
+
+def decode_body(content, encoding):
+    """bytes -> str the way requests' Response.text does it (charset detection when undeclared)."""
+    if not content:
+        return ""
+    if encoding is None:
+        encoding = requests.compat.chardet.detect(content)["encoding"]
+    try:
+        return str(content, encoding, errors="replace")
+    except (LookupError, TypeError):
+        return str(content, errors="replace")
+
+
+def extract_page(html, url, extractor="stream"):
+    """
+    Links and forms of a page: (set of canonical absolute URLs, [{"action", "method", "fields"}])
+    with form actions resolved like links (a form without action posts to the page
+    itself). Falls back to bs4 if the extractor fails.
+    """
+    try:
+        hrefs, raw_forms = LINK_EXTRACTORS[extractor](html)
+    except Exception:
+        # fall back to the full BeautifulSoup parse
+        hrefs, raw_forms = extract_hrefs_bs4(html)
+    links = set()
+    for href in hrefs:
+        try:
+            links.add(canonicalize_url(urljoin(url, href)))
+        except ValueError:
+            continue  # malformed link (bad port, broken IPv6 literal, ...)
+    forms = []
+    for form in raw_forms:
+        try:
+            forms.append(dict(form, action=canonicalize_url(urljoin(url, form["action"]))))
+        except ValueError:
+            continue
+    return links, forms
+
+
+def extract_links(html, url, extractor="stream"):
+    """Canonical absolute URLs of the links in html."""
+    return extract_page(html, url, extractor)[0]
+
+
+def _links_job(content, encoding, url, extractor):
+    return sorted(extract_links(decode_body(content, encoding), url, extractor))
+
+
+def _page_job(content, encoding, url, extractor):
+    html = decode_body(content, encoding)
+    links, forms = extract_page(html, url, extractor)
+    return sorted(links), forms, simhash(html)
+
+
+def _sql_errors_job(content, encoding):
+    return SQL_ERROR_MATCHER.search_all(decode_body(content, encoding))
+
+
+def _reflection_job(content, encoding, markers):
+    return reflection_contexts(decode_body(content, encoding), markers)
+
+
+class ParsePool:
+    """
+    Runs the parse/match jobs inline (processes=0) or on a process pool.
+    Bodies may be given as a requests.Response or as text.
+    """
+
+    def __init__(self, processes=0):
+        self.processes = max(0, processes)
+        self.pool = None
+        if self.processes:
+            # spawn, not fork: the pool lives next to many network threads
+            self.pool = ProcessPoolExecutor(max_workers=self.processes,
+                                            mp_context=multiprocessing.get_context("spawn"))
+
+    @staticmethod
+    def _payload(body):
+        if isinstance(body, requests.Response):
+            return body.content or b"", body.encoding
+        return (body or "").encode("utf-8"), "utf-8"
+
+    @staticmethod
+    def _text(body):
+        return body.text if isinstance(body, requests.Response) else (body or "")
+
+    def links(self, body, url, extractor="stream"):
+        if self.pool is None:
+            return extract_links(self._text(body), url, extractor)
+        return set(self.pool.submit(_links_job, *self._payload(body), url, extractor).result())
+
+    def parse_page(self, body, url, extractor="stream"):
+        """(links, forms, simhash sketch) of a crawled HTML page."""
+        if self.pool is None:
+            html = self._text(body)
+            links, forms = extract_page(html, url, extractor)
+            return links, forms, simhash(html)
+        links, forms, sketch = self.pool.submit(_page_job, *self._payload(body), url, extractor).result()
+        return set(links), forms, sketch
+
+    def sql_errors(self, body):
+        if self.pool is None:
+            return SQL_ERROR_MATCHER.search_all(self._text(body))
+        return self.pool.submit(_sql_errors_job, *self._payload(body)).result()
+
+    def reflection_contexts(self, body, markers):
+        if self.pool is None:
+            return reflection_contexts(self._text(body), markers)
+        return self.pool.submit(_reflection_job, *self._payload(body), list(markers)).result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
 # ----- Crawler -----
 
 
+STATIC_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".bmp", ".css", ".js", ".map",
+                     ".woff", ".woff2", ".ttf", ".eot", ".pdf", ".zip", ".gz", ".mp3", ".mp4", ".webm", ".avi"}
+DYNAMIC_EXTENSIONS = {".php", ".asp", ".aspx", ".jsp", ".jspx", ".cgi", ".pl", ".py", ".do", ".action", ".cfm"}
+
+
+def novelty_key(url):
+    """endpoint_template with digit runs folded, so /item/17 and /item/18 count as one template."""
+    return re.sub(r"\d+", "0", endpoint_template(url))
+
+
+def frontier_score(url, depth=0, form_action=False, template_seen=0):
+    """
+    Crawl priority of a URL, higher is fetched first. Query parameters and form
+    actions lead to testable endpoints and server-side script extensions tend to
+    take input, static assets never do; deeper URLs and templates that were
+    already queued several times rank lower.
+    """
+    parsed = urlparse(url)
+    score = 3.0 * min(len(parse_qsl(parsed.query, keep_blank_values=True)), 5)
+    if form_action:
+        score += 4
+    ext = os.path.splitext(parsed.path)[1].lower()
+    if ext in STATIC_EXTENSIONS:
+        score -= 8
+    elif ext in DYNAMIC_EXTENSIONS:
+        score += 2
+    score -= 0.5 * depth
+    score += 2 if template_seen == 0 else -0.5 * min(template_seen, 6)
+    return score
+
+
+def url_fingerprint(url):
+    """64-bit hash of a URL, the unit of the compact crawl state."""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big")
+
+
+class _UrlFingerprints:
+    """
+    Base of the compact URL sets: members are url_fingerprint values, which
+    subclasses store in add_fingerprint() and test in __contains__; self.count
+    is the number of added URLs.
+    """
+
+    def add(self, url):
+        self.add_fingerprint(url_fingerprint(url))
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __len__(self):
+        return self.count
+
+    def load(self, saved):
+        """Add checkpointed members: url_fingerprint values, or URLs (an exact-mode checkpoint)."""
+        for item in saved:
+            if isinstance(item, str):
+                self.add(item)
+            else:
+                self.add_fingerprint(item)
+
+
+class FingerprintSet(_UrlFingerprints):
+    """
+    Set of URLs kept as url_fingerprint values in one flat open-addressing
+    table (8 bytes per slot, at most 2/3 full) instead of str objects in a set.
+    A URL is wrongly reported as present only on a 64-bit hash collision.
+    """
+
+    def __init__(self):
+        self.table = array("Q", [0]) * 1024
+        self.count = 0
+
+    def _slot(self, fp):
+        # fingerprints are uniform, so their low bits index the table; 0 marks a free slot
+        mask = len(self.table) - 1
+        i = fp & mask
+        while self.table[i] and self.table[i] != fp:
+            i = (i + 1) & mask
+        return i
+
+    def add_fingerprint(self, fp):
+        fp = fp or 1
+        i = self._slot(fp)
+        if self.table[i]:
+            return
+        self.table[i] = fp
+        self.count += 1
+        if 3 * self.count > 2 * len(self.table):
+            old, self.table = self.table, array("Q", [0]) * (2 * len(self.table))
+            for fp in old:
+                if fp:
+                    self.table[self._slot(fp)] = fp
+
+    def __contains__(self, url):
+        return self.table[self._slot(url_fingerprint(url) or 1)] != 0
+
+
+class BloomFilter(_UrlFingerprints):
+    """
+    Scalable Bloom filter over url_fingerprint values: a stage is a bit array
+    sized for `capacity` URLs; when it is full the next stage gets twice the
+    capacity and half the error rate, so the combined false-positive rate stays
+    below fp_rate however many URLs arrive (about 1.2 bytes per URL at 1%).
+    False positives make an unseen URL look seen; len() counts added URLs.
+    """
+
+    def __init__(self, fp_rate=0.001, capacity=1 << 16):
+        self.fp_rate = fp_rate
+        self.stages = []
+        self.count = 0
+        self._add_stage(capacity, fp_rate / 2)
+
+    def _add_stage(self, capacity, rate):
+        bits = max(64, int(-capacity * math.log(rate) / math.log(2) ** 2))
+        self.stages.append({"capacity": capacity, "rate": rate, "count": 0,
+                            "hashes": max(1, round(bits / capacity * math.log(2))),
+                            "bits": bits, "array": bytearray((bits + 7) // 8)})
+
+    @staticmethod
+    def _positions(stage, fp):
+        # double hashing: the two fingerprint halves generate all k bit positions
+        h1, h2, bits = fp & 0xFFFFFFFF, (fp >> 32) | 1, stage["bits"]
+        return [(h1 + i * h2) % bits for i in range(stage["hashes"])]
+
+    def _contains(self, fp):
+        h1, h2 = fp & 0xFFFFFFFF, (fp >> 32) | 1
+        for stage in self.stages:
+            bits, arr = stage["bits"], stage["array"]
+            for i in range(stage["hashes"]):
+                pos = (h1 + i * h2) % bits
+                if not arr[pos >> 3] & (1 << (pos & 7)):
+                    break
+            else:
+                return True
+        return False
+
+    def add_fingerprint(self, fp):
+        if self._contains(fp):
+            return
+        stage = self.stages[-1]
+        if stage["count"] >= stage["capacity"]:
+            self._add_stage(2 * stage["capacity"], stage["rate"] / 2)
+            stage = self.stages[-1]
+        for pos in self._positions(stage, fp):
+            stage["array"][pos >> 3] |= 1 << (pos & 7)
+        stage["count"] += 1
+        self.count += 1
+
+    def __contains__(self, url):
+        return self._contains(url_fingerprint(url))
+
+
+class CrawlFrontier:
+    """
+    URLs waiting to be fetched, as (url, depth). "bfs" pops them in discovery
+    order; "priority" pops the highest frontier_score first (discovery order
+    among equal scores). With memory_limit set, at most that many entries stay
+    in memory: the lowest-ranked half goes to a temporary sqlite file whenever
+    the limit is hit, entries ranking behind the spilled ones go straight
+    there, and the best spilled entries are read back in batches when they
+    outrank everything left in memory.
+    """
+
+    def __init__(self, order="priority", memory_limit=0, spill_dir=None):
+        self.order = order
+        self.heap = []  # (key, seq, url, depth); bfs uses key 0 so seq alone orders it
+        self.seq = 0
+        self.template_seen = {}
+        self.memory_limit = max(0, memory_limit)
+        self.spill_dir = spill_dir
+        self.db = None
+        self.spill_path = None
+        self.spilled = 0
+        self.disk_best = None  # (key, seq) of the best spilled entry
+
+    def push(self, url, depth=0, form_action=False):
+        key = 0.0
+        if self.order != "bfs":
+            template = novelty_key(url)
+            seen = self.template_seen.get(template, 0)
+            self.template_seen[template] = seen + 1
+            key = -frontier_score(url, depth, form_action, seen)
+        entry = (key, self.seq, url, depth)
+        self.seq += 1
+        if self.spilled and entry[:2] > self.disk_best:
+            self._spill([entry])
+            return
+        heapq.heappush(self.heap, entry)
+        if self.memory_limit and len(self.heap) > self.memory_limit:
+            self.heap.sort()
+            keep = max(1, self.memory_limit // 2)
+            self._spill(self.heap[keep:])
+            del self.heap[keep:]  # a sorted list is a valid heap
+
+    def _spill(self, entries):
+        if self.db is None:
+            fd, self.spill_path = tempfile.mkstemp(prefix="frontier-", suffix=".sqlite", dir=self.spill_dir)
+            os.close(fd)
+            self.db = sqlite3.connect(self.spill_path, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=OFF")
+            self.db.execute("PRAGMA synchronous=OFF")
+            self.db.execute("CREATE TABLE frontier (key REAL, seq INTEGER PRIMARY KEY, url TEXT, depth INTEGER)")
+            self.db.execute("CREATE INDEX frontier_order ON frontier (key, seq)")
+        self.db.executemany("INSERT INTO frontier VALUES (?, ?, ?, ?)", entries)
+        self.spilled += len(entries)
+        best = min(entries)[:2]
+        if self.disk_best is None or best < self.disk_best:
+            self.disk_best = best
+
+    def _refill(self):
+        batch = self.db.execute("SELECT key, seq, url, depth FROM frontier ORDER BY key, seq LIMIT ?",
+                                (max(1, self.memory_limit // 2),)).fetchall()
+        self.db.execute("DELETE FROM frontier WHERE seq IN (SELECT seq FROM frontier ORDER BY key, seq LIMIT ?)",
+                        (len(batch),))
+        self.spilled -= len(batch)
+        for entry in batch:
+            heapq.heappush(self.heap, entry)
+        row = self.db.execute("SELECT key, seq FROM frontier ORDER BY key, seq LIMIT 1").fetchone()
+        self.disk_best = tuple(row) if row else None
+
+    def pop(self):
+        if self.spilled and (not self.heap or self.heap[0][:2] > self.disk_best):
+            self._refill()
+        _, _, url, depth = heapq.heappop(self.heap)
+        return url, depth
+
+    def __len__(self):
+        return len(self.heap) + self.spilled
+
+    def drain(self):
+        """Pop everything left, in pop order, without loading a spilled frontier at once."""
+        while len(self):
+            yield self.pop()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            os.remove(self.spill_path)
+
+
 class EndpointDiscoverer:
-    def __init__(self, base_url, max_pages=200, session=None):
-        self.base_url = base_url if base_url.startswith(("http://", "https://")) else "http://" + base_url
+    CHECKPOINT_EVERY = 25
+
+    def __init__(self, base_url, max_pages=200, session=None, concurrency=1, link_extractor="stream",
+                 baseline_cache=None, http_cache=None, parse_pool=None, crawl_order="priority",
+                 state_mode="exact", bloom_fp_rate=0.001, frontier_memory=0, spill_dir=None):
+        self.base_url = canonicalize_url(normalize_base_url(base_url))
         self.parsed_base = urlparse(self.base_url)
         self.max_pages = max_pages
-        self.session = session or requests.Session()
-        self.visited = set()
-        self.endpoints = set()
+        self.session = session or build_session()
+        self.concurrency = max(1, concurrency)  # max in-flight fetches against this host
+        self.link_extractor = link_extractor  # key of LINK_EXTRACTORS
+        self.parse_pool = parse_pool or ParsePool()  # where link extraction runs
+        self.crawl_order = crawl_order  # "priority" (CrawlFrontier scoring) or "bfs"
+        self.baseline_cache = baseline_cache  # seeded with fetched HTML pages when given
+        self.http_cache = http_cache  # CrawlCache for conditional re-crawls, optional
+        # "exact" keeps URL strings; "fingerprint" keeps 64-bit URL hashes (FingerprintSet);
+        # "bloom" additionally keeps visited / scheduled URLs in a BloomFilter
+        self.state_mode = state_mode
+        self.bloom_fp_rate = bloom_fp_rate
+        self.frontier_memory = frontier_memory  # max frontier entries in memory, the rest spill to disk (0 = all)
+        self.spill_dir = spill_dir  # where frontier spill files go (None = system temp dir)
+        self.visited = self._url_set(approximate=True)
+        self.endpoints = self._url_set()
+        # content hash of each fetched page (incremental scans), see fingerprint(); keyed by
+        # URL, or by url_fingerprint in a compact state mode
+        self.fingerprints = {}
+        self.sketches = {}  # url -> simhash of fetched HTML pages (near-duplicate detection)
+        self.checkpoint = None  # callable(state dict), called every CHECKPOINT_EVERY pages
+        self.resume_state = None  # merged checkpoints (ScanJournal.load) to continue from instead of the base URL
+        self.changes = None  # crawl state added since the last checkpoint (only while checkpointing)
+        self.on_endpoint = None  # callable(url), called once per endpoint as soon as it is final
+        self.seeds = []  # extra start URLs (sitemap entries), queued like links of the start page
+        self.stop = None  # threading.Event; when set the crawl checkpoints and returns early
+        self.post_forms = False  # also hand over POST form submissions (--scan-post-forms)
+        self.emitted = self._url_set()
 
     def extract_links(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
+        return self.parse_pool.links(html, url, self.link_extractor)
+
+    def fetch_page(self, url):
+        """
+        Fetch one page (runs on a crawl worker thread).
+        Returns (ok, links, fingerprint, sketch, forms): ok is False for
+        failed/error responses, links is the set of extracted links for HTML
+        pages (empty otherwise), fingerprint the content hash of the page,
+        sketch its simhash (None unless HTML) and forms its forms; on a 304
+        everything but ok comes from the cache.
+        """
+        headers = {"User-Agent": "Security-Scanner/1.0"}
+        cached = self.http_cache.lookup(url) if self.http_cache is not None else None
+        headers.update(CrawlCache.conditional_headers(cached))
+        resp = safe_get(self.session, url, headers=headers, skip_binary=True)
+        if resp is not None and resp.status_code == 304 and cached is not None:
+            # unchanged since the last run: reuse the links extracted back then
+            self.http_cache.mark_revalidated()
+            return True, set(cached["links"]), cached["body_hash"], cached["simhash"], cached["forms"]
+        if not resp or resp.status_code >= 400:
+            return False, set(), None, None, []
+        content_type = resp.headers.get("Content-Type", "")
         links = set()
-        for tag in soup.find_all(["a", "form", "link", "script"]):
-            href = tag.get("href") or tag.get("action")
-            if not href:
-                continue
-            full = urljoin(url, href)
-            parsed = urlparse(full)
-            full = urlunparse(parsed._replace(fragment=""))
-            links.add(full)
-        return links
+        forms = []
+        sketch = None
+        if "html" in content_type.lower():
+            if self.baseline_cache is not None:
+                self.baseline_cache.put(url, resp.text)
+            links, forms, sketch = self.parse_pool.parse_page(resp, url, self.link_extractor)
+        fingerprint = content_hash(resp.content)
+        if self.http_cache is not None and not resp.truncated:
+            self.http_cache.store(url, resp, links, fingerprint, sketch, forms)
+        return True, links, fingerprint, sketch, forms
+
+    def probe_soft_404(self):
+        """
+        Fetch a URL that cannot exist. Returns (url, fingerprint, sketch) if the
+        site answers it with an HTML page instead of an error (a soft-404), else None.
+        """
+        url = urljoin(self.base_url, f"/{uuid.uuid4().hex}-not-found")
+        resp = safe_get(self.session, url, headers={"User-Agent": "Security-Scanner/1.0"})
+        if not resp or resp.status_code >= 400 or "html" not in resp.headers.get("Content-Type", "").lower():
+            return None
+        sketch = self.parse_pool.parse_page(resp, url, self.link_extractor)[2]
+        return url, content_hash(resp.content), sketch
+
+    def sitemap_locations(self):
+        """Sitemaps announced in robots.txt ("Sitemap:" lines), else the conventional /sitemap.xml."""
+        resp = safe_get(self.session, urljoin(self.base_url, "/robots.txt"))
+        found = []
+        if resp is not None and resp.status_code < 400:
+            for line in resp.text.splitlines():
+                name, _, value = line.partition(":")
+                if name.strip().lower() == "sitemap" and value.strip():
+                    found.append(value.strip())
+        return found or [urljoin(self.base_url, "/sitemap.xml")]
+
+    def iter_sitemap(self, url):
+        """
+        Yield ("sitemap" | "url", loc) for every <loc> of one sitemap or sitemap
+        index while it downloads: the raw stream is gunzipped incrementally when
+        it is a .gz file and fed to an XMLPullParser, and finished entries are
+        dropped, so memory stays flat however long the sitemap is.
+        """
+        try:
+            resp = self.session.get(url, stream=True, allow_redirects=True,
+                                    headers={"User-Agent": "Security-Scanner/1.0"})
+        except requests.RequestException:
+            return
+        with resp:
+            if resp.status_code >= 400:
+                return
+            parser = XMLPullParser(events=("start", "end"))
+            inflate = None
+            root = None
+            try:
+                for chunk in resp.iter_content(64 * 1024):
+                    if inflate is None:
+                        # gzip files (not Content-Encoding, which requests already undoes)
+                        inflate = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk[:2] == b"\x1f\x8b" else False
+                    parser.feed(inflate.decompress(chunk) if inflate else chunk)
+                    for event, elem in parser.read_events():
+                        tag = elem.tag.rsplit("}", 1)[-1]
+                        if event == "start":
+                            if root is None:
+                                root = elem
+                        elif tag == "loc" and elem.text and elem.text.strip():
+                            kind = "sitemap" if root.tag.rsplit("}", 1)[-1] == "sitemapindex" else "url"
+                            yield kind, elem.text.strip()
+                        elif tag in ("url", "sitemap"):
+                            root.clear()
+            except (ParseError, zlib.error, requests.RequestException):
+                return
+
+    def sitemap_seeds(self, max_urls=SITEMAP_MAX_URLS, max_documents=SITEMAP_MAX_DOCUMENTS):
+        """
+        Same-origin page URLs listed in the site's sitemaps, following sitemap
+        indexes on the same host, in document order.
+        """
+        pending = deque(self.sitemap_locations())
+        seen_documents = set(pending)
+        seeds = []
+        seen = set()
+        fetched = 0
+        while pending and fetched < max_documents and len(seeds) < max_urls:
+            document = pending.popleft()
+            fetched += 1
+            for kind, loc in self.iter_sitemap(document):
+                try:
+                    loc = canonicalize_url(urljoin(document, loc))
+                except ValueError:
+                    continue
+                if kind == "sitemap":
+                    if loc not in seen_documents and urlparse(loc).hostname == self.parsed_base.hostname:
+                        seen_documents.add(loc)
+                        pending.append(loc)
+                elif loc not in seen and same_origin(self.base_url, loc):
+                    seen.add(loc)
+                    seeds.append(loc)
+                    if len(seeds) >= max_urls:
+                        break
+        return seeds
 
     def crawl(self):
-        to_visit = [self.base_url]
-        while to_visit and len(self.visited) < self.max_pages:
-            url = to_visit.pop(0)
-            if url in self.visited:
-                continue
-            resp = safe_get(self.session, url, headers={"User-Agent": "Security-Scanner/1.0"})
-            self.visited.add(url)
-            if not resp or resp.status_code >= 400:
-                continue
+        """
+        Same-origin crawl with up to `concurrency` fetches in flight, in
+        priority order (URLs likely to yield testable endpoints first) or
+        breadth-first. The frontier, visited set and page budget are only touched on this thread,
+        so the crawl obeys the same rules as a sequential one while its duration
+        is bounded by server latency / concurrency instead of the summed latency.
+        Sitemap seeds (self.seeds) enter the frontier like links of the start
+        page. With on_endpoint set, endpoints are handed over while the crawl runs: a
+        fetched page right after its fetch (its fingerprint is known then), a link
+        that will never be fetched as soon as it is found, a form submission
+        (form_endpoint) as soon as its form is parsed, and anything left when
+        the crawl ends. When self.stop is set the crawl writes a checkpoint and
+        returns without handing over the rest. Returns the number of endpoints found (the sorted URLs
+        are self.endpoints in exact state mode).
+        Checkpoints only carry what was added since the previous one (see
+        ScanJournal), so checkpointing a long crawl costs linear, not quadratic, I/O.
+        """
+        to_visit = CrawlFrontier(self.crawl_order, self.frontier_memory, self.spill_dir)
+        # URLs ever pushed to the frontier; popped ones are in visited too, so
+        # "scheduled and not visited" means waiting in the frontier
+        scheduled = self._url_set(approximate=True)
+        refetch = set()  # in flight when the checkpoint was taken, already counted in visited
+        if self.checkpoint is not None:
+            self.changes = self._no_changes()
+
+        def schedule(url, depth, form_action=False):
+            to_visit.push(url, depth, form_action)
+            scheduled.add(url)
+            if self.changes is not None:
+                self.changes["scheduled"].append((url, depth))
+
+        if not self.resume_state:
+            schedule(self.base_url, 0)
+        else:
+            saved = self.resume_state
+            self._restore(self.visited, saved["visited"])
+            self._restore(self.endpoints, saved["endpoints"])
+            self.fingerprints.update(saved["fingerprints"])  # [key, content hash] pairs
+            self.sketches.update(saved["sketches"])
+            refetch.update(saved["in_flight"])
+            # the frontier is every scheduled URL not fetched yet, in scheduling order
+            for url, depth in saved["scheduled"]:
+                if url not in self.visited or url in refetch:
+                    to_visit.push(url, depth)
+                scheduled.add(url)
+            for url in saved["pending"]:
+                self._emit(url)
+        approximate = self.state_mode == "bloom"
+        in_flight = {}
+        completed = 0
+
+        def discover(link, depth, form_action=False):
+            if not same_origin(self.base_url, link) or link in self.visited:
+                return
+            known = link in self.endpoints
+            self._add_endpoint(link)
+            # every page is crawled, --per-template only caps scanning: later /list?page=N pages
+            # still lead to new links, and repeated templates already rank low in the frontier
+            if link not in scheduled and self._has_room(len(to_visit)):
+                schedule(link, depth, form_action)
+            elif link not in scheduled or (approximate and not known and link != self.base_url):
+                # the page budget only tightens, so it is never fetched
+                # (nor is a new link that only looks scheduled because of a Bloom false positive)
+                self._emit(link)
+
+        if not self.resume_state:
+            for seed in self.seeds:
+                discover(seed, 1)
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                while to_visit or in_flight:
+                    if self.stop is not None and self.stop.is_set():
+                        # interrupted: this last checkpoint lists the fetches in flight for a resumed crawl to redo
+                        if self.checkpoint is not None:
+                            self._checkpoint(in_flight)
+                        return len(self.endpoints)
+                    # top up the in-flight window while the page budget allows
+                    while to_visit and len(in_flight) < self.concurrency and len(self.visited) < self.max_pages:
+                        url, depth = to_visit.pop()
+                        if url in self.visited and url not in refetch:
+                            if approximate and url in self.endpoints:
+                                self._emit(url)  # skipped on a Bloom false positive
+                            continue
+                        refetch.discard(url)
+                        self.visited.add(url)
+                        if self.changes is not None:
+                            self.changes["visited"].append(self._key(url))
+                        in_flight[pool.submit(self.fetch_page, url)] = (url, depth)
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        url, depth = in_flight.pop(fut)
+                        ok, links, fingerprint, sketch, forms = fut.result()
+                        if not ok:
+                            if url in self.endpoints:
+                                self._emit(url)
+                            continue
+                        self._add_endpoint(url)
+                        self.set_fingerprint(url, fingerprint)
+                        if sketch is not None:
+                            self.sketches[url] = sketch
+                        if self.changes is not None:
+                            self.changes["fingerprints"].append((self._key(url), fingerprint))
+                            if sketch is not None:
+                                self.changes["sketches"][url] = sketch
+                        self._emit(url)
+                        actions = {form["action"] for form in forms}
+                        for link in sorted(links):  # set order varies between runs
+                            discover(link, depth + 1, link in actions)
+                        for form in forms:
+                            # submissions are scanned, never crawled; POST forms (login, signup, contact...)
+                            # may change server state, so they are only submitted when asked to
+                            if form["method"] == "post" and not self.post_forms:
+                                continue
+                            endpoint = form_endpoint(form)
+                            if endpoint and same_origin(self.base_url, form["action"]):
+                                self._add_endpoint(endpoint)
+                                self._emit(endpoint)
+                    completed += len(done)
+                    if self.checkpoint is not None and completed >= self.CHECKPOINT_EVERY:
+                        completed = 0
+                        self._checkpoint(in_flight)
+            if isinstance(self.endpoints, set):
+                for url in sorted(self.endpoints):
+                    self._emit(url)
+            else:
+                # compact state keeps no URL list: endpoints not handed over yet are still in the frontier
+                for url, _ in to_visit.drain():
+                    if url in self.endpoints:
+                        self._emit(url)
+        finally:
+            to_visit.close()
+        return len(self.endpoints)
+
+    def _url_set(self, approximate=False):
+        """
+        Container for a set of crawl URLs in the configured state mode. Only
+        sets whose false positives merely skip a URL (visited, scheduled) may
+        be approximate; endpoint bookkeeping always stays exact.
+        """
+        if self.state_mode == "exact":
+            return set()
+        if approximate and self.state_mode == "bloom":
+            return BloomFilter(self.bloom_fp_rate)
+        return FingerprintSet()
+
+    @staticmethod
+    def _restore(target, saved):
+        if isinstance(target, set):
+            target.update(saved)
+        else:
+            target.load(saved)
+
+    def _emit(self, url):
+        if self.on_endpoint is not None and url not in self.emitted:
+            self.emitted.add(url)
+            self.on_endpoint(url)
+            if self.state_mode != "exact":
+                self.sketches.pop(url, None)  # only needed until the endpoint is handed over
+
+    def _has_room(self, queued_count):
+        # breadth-first stops queueing once visited + queued fill the budget; the
+        # priority frontier keeps queueing so later, better URLs can still win
+        if self.crawl_order == "bfs":
+            return len(self.visited) + queued_count < self.max_pages
+        return len(self.visited) < self.max_pages
+
+    def _key(self, url):
+        # a compact state mode keys fingerprints and checkpoints visited / endpoint URLs by url_fingerprint
+        return url if self.state_mode == "exact" else url_fingerprint(url)
+
+    def fingerprint(self, url):
+        """Content hash of a fetched page, or None."""
+        return self.fingerprints.get(self._key(url))
+
+    def set_fingerprint(self, url, fingerprint):
+        self.fingerprints[self._key(url)] = fingerprint
+
+    def _add_endpoint(self, url):
+        if url not in self.endpoints:
             self.endpoints.add(url)
-            content_type = resp.headers.get("Content-Type", "")
-            if "html" not in content_type.lower():
-                continue
-            links = self.extract_links(resp.text, url)
-            for link in links:
-                if same_origin(self.base_url, link) and link not in self.visited:
-                    if len(self.visited) + len(to_visit) < self.max_pages:
-                        to_visit.append(link)
-                    self.endpoints.add(link)
-        return sorted(self.endpoints)
+            if self.changes is not None:
+                self.changes["endpoints"].append(self._key(url))
+
+    def _checkpoint(self, in_flight):
+        # pages still in flight are already visited; in_flight makes a resumed crawl refetch them
+        state, self.changes = self.changes, self._no_changes()
+        state["in_flight"] = [url for url, _ in in_flight.values()]
+        self.checkpoint(state)
+
+    @staticmethod
+    def _no_changes():
+        return {"visited": [], "endpoints": [], "scheduled": [], "fingerprints": [], "sketches": {}}
 
 
 # ----- Scanner with enhanced heuristics -----
 
 
 class VulnerabilityScanner:
-    def __init__(self, session=None):
-        self.session = session or requests.Session()
+    def __init__(self, session=None, baseline_cache=None, batch_reflection=True, parse_pool=None):
+        self.session = session or build_session()
+        self.baseline_cache = baseline_cache or BaselineCache()
+        self.batch_reflection = batch_reflection
+        self.parse_pool = parse_pool or ParsePool()  # where matching / context classification runs
+
+    def get_baseline(self, url):
+        """Body of the unmodified page, shared by all checks and parameters of an endpoint."""
+        return self.baseline_cache.fetch(self.session, url)
 
     def detect_query_params(self, url):
+        """Injectable parameters: the query string of a URL, the form body of a POST endpoint."""
+        method, url, body = split_endpoint(url)
+        if body is not None:
+            return {k: [v] for k, v in body.items()}
         parsed = urlparse(url)
-        return {k: v for k, v in parse_qs(parsed.query).items()}
+        return {k: v for k, v in parse_qs(parsed.query, keep_blank_values=True).items()}
 
     def inject_query(self, url, param, payload):
+        return self.inject_query_many(url, {param: payload})
+
+    def inject_query_many(self, url, payloads):
+        """Like inject_query, but sets several parameters at once ({param: payload})."""
+        method, url, body = split_endpoint(url)
+        if body is not None:
+            return join_endpoint(method, url, {**body, **payloads})
         parsed = urlparse(url)
-        qs = parse_qs(parsed.query)
-        qs[param] = [payload]
-        new_qs = urlencode(qs, doseq=True)
-        new = urlunparse(parsed._replace(query=new_qs))
-        return new
+        qs = parse_qs(parsed.query, keep_blank_values=True)
+        for param, payload in payloads.items():
+            qs[param] = [payload]
+        return urlunparse(parsed._replace(query=urlencode(qs, doseq=True)))
+
+    def send(self, url, allow_redirects=True):
+        return send_endpoint(self.session, url, allow_redirects=allow_redirects)
+
+    def fetch_reflection_probes(self, url, tokens):
+        """
+        Send the marker tokens ({param: token}) and return {param: (test_url, body)},
+        body being the response (or "" when the request failed).
+        In batch mode all tokens go out in one request and reflections are
+        attributed by token; parameters are only probed one at a time when the
+        server rejects the combined request (error status or request failure).
+        """
+        probes = {}
+        if self.batch_reflection and len(tokens) > 1:
+            batch_url = self.inject_query_many(url, tokens)
+            try:
+                r = self.send(batch_url)
+            except requests.RequestException:
+                r = None
+            if r is not None and r.status_code < 400:
+                probes = {p: (batch_url, r) for p in tokens}
+        for p, token in tokens.items():
+            if p in probes:
+                continue
+            test_url = self.inject_query(url, p, token)
+            try:
+                r = self.send(test_url)
+                body = r if r else ""
+            except requests.RequestException:
+                body = ""
+            probes[p] = (test_url, body)
+        return probes
 
     def classify_reflection_context(self, body, marker):
         """
-        Return a coarse-grained classification where the marker appears:
-        - 'html' : appears in HTML text nodes
-        - 'attribute' : appears within an attribute (e.g., src="", href="", title="")
-        - 'script' : appears inside <script>...</script>
-        - 'unknown' : marker not present
+        Return the most dangerous context the marker appears in (see reflection_contexts):
+        'script', 'attribute-unquoted', 'attribute-double', 'attribute-single',
+        'attribute-name', 'tag', 'style', 'html', 'rcdata', 'comment',
+        or 'unknown' if the marker is not present.
         """
-        if marker not in body:
-            return "unknown"
-        # quick checks
-        # script
-        if re.search(r"<script[^>]*>[^<]*" + re.escape(marker), body, flags=re.IGNORECASE | re.DOTALL):
-            return "script"
-        # attribute (heuristic: marker inside attr quotes within a tag)
-        if re.search(r"<[a-zA-Z0-9\-]+\s[^>]*=[\"'][^\"'>]*" + re.escape(marker), body, flags=re.IGNORECASE | re.DOTALL):
-            return "attribute"
-        # else html
-        return "html"
+        return strongest_context(self.parse_pool.reflection_contexts(body, [marker])[marker])
 
     def test_xss_and_heuristics(self, url):
         """
         For each query parameter:
          - send a unique benign marker token and check for reflection
+           (all parameters in one request when batch_reflection is on)
          - classify the reflection context if found
          - also mark potential if parameter name is suspicious even without reflection
         Returns a list of finding dicts.
@@ -158,19 +2022,22 @@ class VulnerabilityScanner:
             return findings
 
         # For each param create a distinct marker to avoid cross-echo noise
+        # use a safe payload that's easy to find; keep small and benign
+        tokens = {p: f"{BASE_MARKER}-{p}-{uuid.uuid4().hex[:8]}" for p in params}
+        probes = self.fetch_reflection_probes(url, tokens)
+        # classify all markers sharing a response (batch mode) in one pass over it
+        by_response = {}
+        for p, (test_url, body) in probes.items():
+            by_response.setdefault(test_url, (body, []))[1].append(tokens[p])
+        contexts = {}
+        for body, markers in by_response.values():
+            contexts.update(self.parse_pool.reflection_contexts(body, markers))
         for p in params:
-            unique_token = f"{BASE_MARKER}-{p}-{uuid.uuid4().hex[:8]}"
-            # use a safe payload that's easy to find; keep small and benign
-            payload = f"{unique_token}"
-            test_url = self.inject_query(url, p, payload)
-            try:
-                r = self.session.get(test_url, timeout=12, allow_redirects=True)
-                body = r.text if r else ""
-            except requests.RequestException:
-                body = ""
+            payload = tokens[p]
+            test_url, body = probes[p]
 
-            if payload in body:
-                ctx = self.classify_reflection_context(body, payload)
+            if contexts[payload]:
+                ctx = strongest_context(contexts[payload])
                 findings.append({
                     "param": p,
                     "url": test_url,
@@ -183,11 +2050,7 @@ class VulnerabilityScanner:
                 # Passive heuristics: suspicious param name (eg q, search) or parameter name appears near templates
                 suspicious_name = p.lower() in SUSPICIOUS_PARAM_NAMES
                 # also check if the original parameter name (not value) is present in the page templates - may suggest echoing
-                try:
-                    resp_orig = self.session.get(url, timeout=10)
-                    page_text = resp_orig.text if resp_orig else ""
-                except requests.RequestException:
-                    page_text = ""
+                page_text = self.get_baseline(url)
 
                 name_present = p in page_text
                 if suspicious_name or name_present:
@@ -207,20 +2070,23 @@ class VulnerabilityScanner:
         findings = []
         if not params:
             return findings
+        # error strings already on the unmodified page are not evidence of injection
+        baseline = {m["signature"] for m in self.parse_pool.sql_errors(self.get_baseline(url))}
         for p in params:
             for payload in SQLI_PAYLOADS:
                 test_url = self.inject_query(url, p, payload)
                 try:
-                    r = self.session.get(test_url, timeout=10, allow_redirects=True)
+                    r = self.send(test_url)
                     if not r:
                         continue
-                    body = r.text.lower()
-                    for sig in SQL_ERRORS:
-                        if sig in body:
+                    for match in self.parse_pool.sql_errors(r):
+                        if match["signature"] not in baseline:
                             findings.append({
                                 "param": p,
                                 "url": test_url,
-                                "evidence": sig,
+                                "evidence": match["text"],
+                                "dbms": match["tag"],
+                                "offset": match["offset"],
                                 "confidence": "medium"
                             })
                             break
@@ -236,7 +2102,7 @@ class VulnerabilityScanner:
         for p in params:
             test_url = self.inject_query(url, p, OPEN_REDIRECT_MARKER)
             try:
-                r = self.session.get(test_url, timeout=10, allow_redirects=False)
+                r = self.send(test_url, allow_redirects=False)
                 location = r.headers.get("Location", "") if r else ""
                 if OPEN_REDIRECT_MARKER in location:
                     findings.append({
@@ -252,6 +2118,7 @@ class VulnerabilityScanner:
     def scan_endpoint(self, url):
         return {
             "url": url,
+            "method": split_endpoint(url)[0],
             "xss_candidates": self.test_xss_and_heuristics(url),
             "sqli": self.test_sqli(url),
             "open_redirect": self.test_open_redirect(url)
@@ -275,26 +2142,180 @@ def embed_logo_base64(logo_path):
         return None
 
 
-def save_aggregated_json(overall_results, outdir):
+def load_previous_results(path):
+    """
+    Read an aggregated JSON report from an earlier run.
+    Returns {domain: {url: endpoint result}} (empty if the file is missing or unreadable).
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError) as exc:
+        print(f"[!] No previous results loaded from {path}: {exc}")
+        return {}
+    previous = {}
+    for dom in data:
+        previous[dom.get("domain")] = {e["url"]: e for e in dom.get("endpoints", []) if e.get("url")}
+    return previous
+
+
+def domain_output_dir(outdir, domain):
+    return os.path.join(outdir, re.sub(r"[^A-Za-z0-9._-]", "_", domain))
+
+
+def render_clusters_html(clusters):
+    """Note listing the near-duplicate / soft-404 clusters whose extra endpoints were not scanned."""
+    if not clusters:
+        return ""
+    html = [f"<div class='small' style='margin-bottom:8px'>{sum(c['skipped'] for c in clusters)} near-duplicate endpoint(s) not scanned:<ul>"]
+    for c in clusters:
+        examples = ", ".join(escape(u) for u in c["examples"])
+        html.append(f"<li>{escape(c['kind'])} of <span class='evidence'>{escape(c['representative'])}</span>: "
+                    f"{c['members']} page(s), {c['skipped']} skipped (e.g. {examples})</li>")
+    html.append("</ul></div>")
+    return "".join(html)
+
+
+def render_endpoint_html(e):
+    """HTML block for one endpoint result."""
+    html = []
+    html.append("<div class='endpoint'>")
+    html.append(f"<div class='url'>{escape(e.get('url'))}</div>")
+    if e.get("carried_forward"):
+        html.append(f"<div class='small'>Unchanged since last scan; findings carried forward (last verified: {escape(str(e.get('last_verified') or 'unknown'))})</div>")
+    # quick summary line
+    xcount = len(e.get("xss_candidates", []))
+    scount = len(e.get("sqli", []))
+    ocount = len(e.get("open_redirect", []))
+    if xcount + scount + ocount == 0:
+        html.append("<div class='finding-none' style='margin-top:8px'>Findings: No Immediate Flaws Detected</div>")
+    else:
+        html.append(f"<div style='margin-top:8px'><strong>Findings:</strong></div>")
+
+    # render XSS candidates with potential box (yellow)
+    for f in e.get("xss_candidates", []):
+        if f.get("type") == "reflected":
+            ctx = f.get("context", "html")
+            conf = f.get("confidence", "medium")
+            html.append("<div class='potential'>")
+            html.append(f"<strong>Potential XSS Injection Point</strong> on parameter <strong>{escape(f.get('param'))}</strong> — <span class='small'>context: {escape(ctx)}, confidence: {escape(conf)}</span>")
+            html.append(f"<div class='small' style='margin-top:6px'>Evidence: <span class='evidence'>{escape(f.get('evidence'))}</span></div>")
+            html.append("</div>")
+        else:
+            # potential low-confidence heuristic
+            html.append("<div class='potential' style='border-left:6px solid #ffd54a'>")
+            html.append(f"<strong>Potential XSS (heuristic)</strong> on parameter <strong>{escape(f.get('param'))}</strong>")
+            html.append(f"<div class='small' style='margin-top:6px'>Reason: {escape(f.get('evidence'))} — confidence: {escape(f.get('confidence'))}</div>")
+            html.append("</div>")
+
+    # SQLi details
+    if e.get("sqli"):
+        html.append("<div style='margin-top:8px'><strong>SQLi Findings:</strong></div>")
+        html.append("<table><thead><tr><th>Param</th><th>DBMS</th><th>Evidence</th></tr></thead><tbody>")
+        for s in e.get("sqli", []):
+            html.append(f"<tr><td>{escape(s.get('param'))}</td><td>{escape(s.get('dbms') or '-')}</td><td class='evidence'>{escape(s.get('evidence'))}</td></tr>")
+        html.append("</tbody></table>")
+
+    # Open redirect details
+    if e.get("open_redirect"):
+        html.append("<div style='margin-top:8px'><strong>Open-Redirect Findings:</strong></div>")
+        html.append("<table><thead><tr><th>Param</th><th>Location</th></tr></thead><tbody>")
+        for o in e.get("open_redirect", []):
+            html.append(f"<tr><td>{escape(o.get('param'))}</td><td class='evidence'>{escape(o.get('evidence'))}</td></tr>")
+        html.append("</tbody></table>")
+
+    html.append("</div>")  # endpoint
+    return "".join(html)
+
+
+class ReportStream:
+    """
+    Streaming sink for finished endpoint results. Each result is written as it
+    completes: one record in security_scan_results.ndjson and its rendered HTML
+    block appended to the domain's section fragment, while per-domain counters
+    are updated in place. The summary HTML is later assembled from the counters
+    and fragments, so no report step needs every result in memory.
+    """
+
+    NDJSON_NAME = "security_scan_results.ndjson"
+    FRAGMENT_NAME = "report_section.html"
+
+    def __init__(self, outdir, resume=False):
+        os.makedirs(outdir, exist_ok=True)
+        self.outdir = outdir
+        self.path = os.path.join(outdir, self.NDJSON_NAME)
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.fh = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    @staticmethod
+    def _zero():
+        return {"endpoints": 0, "xss": 0, "sqli": 0, "open_redirect": 0, "high": 0, "medium": 0, "low": 0}
+
+    def fragment_path(self, domain):
+        return os.path.join(domain_output_dir(self.outdir, domain), self.FRAGMENT_NAME)
+
+    def start_domain(self, domain):
+        """Begin a fresh section for a domain (drops the fragment of an earlier run)."""
+        os.makedirs(domain_output_dir(self.outdir, domain), exist_ok=True)
+        with self.lock:
+            self.counts[domain] = self._zero()
+        open(self.fragment_path(domain), "w", encoding="utf-8").close()
+
+    def count(self, domain, result):
+        """Add a result to the counters only (it is already in the stream, e.g. when resuming)."""
+        with self.lock:
+            c = self.counts.setdefault(domain, self._zero())
+            c["endpoints"] += 1
+            for check, key in (("xss", "xss_candidates"), ("sqli", "sqli"), ("open_redirect", "open_redirect")):
+                for f in result.get(key, []):
+                    c[check] += 1
+                    c[finding_severity(check, f)] += 1
+
+    def emit(self, domain, result):
+        line = json.dumps(dict(result, domain=domain)) + "\n"
+        block = render_endpoint_html(result)
+        self.count(domain, result)
+        with self.lock:
+            self.fh.write(line)
+            self.fh.flush()
+            with open(self.fragment_path(domain), "a", encoding="utf-8") as frag:
+                frag.write(block)
+
+    def domain_counts(self, domain):
+        with self.lock:
+            return dict(self.counts.get(domain) or self._zero())
+
+    def close(self):
+        with self.lock:
+            self.fh.close()
+
+
+def save_aggregated_json(domain_summaries, outdir):
+    """
+    Aggregated JSON assembled from the per-domain JSON files, streamed into place
+    (same shape as before: a list of {"domain", ..., "endpoints": [...]}).
+    """
     os.makedirs(outdir, exist_ok=True)
     path = os.path.join(outdir, "security_scan_report.json")
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(overall_results, f, indent=2)
+        f.write("[")
+        for i, dom in enumerate(domain_summaries):
+            meta = {k: v for k, v in dom.items() if k != "endpoints"}
+            f.write(("," if i else "") + "\n" + json.dumps(meta)[:-1] + ', "endpoints": ')
+            try:
+                with open(os.path.join(domain_output_dir(outdir, dom["domain"]), "security_scan_report.json"),
+                          "r", encoding="utf-8") as part:
+                    shutil.copyfileobj(part, f)
+            except OSError:
+                f.write("[]")
+            f.write("}")
+        f.write("\n]\n")
     return path
 
 
-def save_professional_html(overall_results, outdir, logo_b64=None):
-    os.makedirs(outdir, exist_ok=True)
-    path = os.path.join(outdir, "security_scan_summary.html")
-
-    # top-level counts
-    total_endpoints = sum(len(dom.get("endpoints", [])) for dom in overall_results)
-    total_xss = sum(len([f for e in dom.get("endpoints", []) for f in e.get("xss_candidates", [])]) for dom in overall_results)
-    total_sqli = sum(len([f for e in dom.get("endpoints", []) for f in e.get("sqli", [])]) for dom in overall_results)
-    total_open = sum(len([f for e in dom.get("endpoints", []) for f in e.get("open_redirect", [])]) for dom in overall_results)
-    scan_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-
-    css = """
+# shared by the summary report and the paged index / detail pages
+REPORT_CSS = """
     body{font-family:Arial,Helvetica,sans-serif;background:#f3f6f9;color:#1c2638;margin:0;padding:24px}
     .container{max-width:1100px;margin:20px auto;background:#fff;border-radius:12px;padding:22px;box-shadow:0 6px 30px rgba(20,30,50,0.06)}
     header{display:flex;gap:16px;align-items:center;border-bottom:1px solid #eef4fb;padding-bottom:16px;margin-bottom:16px}
@@ -303,13 +2324,16 @@ def save_professional_html(overall_results, outdir, logo_b64=None):
     .muted{color:#68737a;font-size:13px}
     .summary{display:flex;gap:10px;margin-top:10px}
     .card{background:#fbfdff;border:1px solid #eaf4ff;padding:10px 12px;border-radius:8px;min-width:120px;text-align:center}
+    .controls{display:flex;gap:8px;align-items:center;margin:12px 0}
     section{margin-top:18px}
     h2{font-size:16px;margin:0 0 10px 0}
     .endpoint{border:1px solid #eef4fb;border-radius:8px;padding:12px;margin-bottom:10px;background:#fff}
     .endpoint .url{font-family:monospace;font-size:13px;color:#0b4a6f}
     .finding-good{color:#0b7a4b;font-weight:600}
-    .finding-none{color:#0b7a4b}
+    .finding-none{color:#0b7a4b;margin-top:8px}
     .potential{background:#fffbe6;border-left:6px solid #ffd54a;padding:10px;border-radius:6px;margin-top:8px}
+    .sev-high{border-left-color:#d9534f}
+    .sev-low{border-left-color:#b8c2cc}
     .evidence{font-family:monospace;font-size:12px;color:#a33;word-break:break-all}
     table{width:100%;border-collapse:collapse;margin-top:8px}
     th,td{padding:8px 6px;border-bottom:1px solid #eef6fb;text-align:left;font-size:13px}
@@ -318,99 +2342,450 @@ def save_professional_html(overall_results, outdir, logo_b64=None):
     footer{margin-top:18px;color:#6b7780;font-size:13px;border-top:1px solid #eef6fb;padding-top:10px}
     """
 
-    html = []
-    html.append("<!doctype html><html><head><meta charset='utf-8'><title>Web Flaw Discovery Report</title>")
-    html.append("<meta name='viewport' content='width=device-width,initial-scale=1'>")
-    html.append(f"<style>{css}</style></head><body><div class='container'>")
 
-    # header
-    logo_html = ""
+def _report_head(title, logo_b64=None):
+    """Document head and the opening of the page header (logo + title); callers close the header."""
     if logo_b64:
         logo_html = f"<div class='logo'><img src='{logo_b64}' style='width:100%;height:100%;object-fit:cover' alt='logo'></div>"
     else:
         logo_html = "<div class='logo'><svg width='52' height='52' viewBox='0 0 24 24' xmlns='http://www.w3.org/2000/svg'><rect rx='6' width='24' height='24' fill='#2d9cdb'/><text x='50%' y='53%' font-size='9' text-anchor='middle' fill='white' font-family='Arial' dy='.3em'>SCAN</text></svg></div>"
+    return (f"<!doctype html><html><head><meta charset='utf-8'><title>{escape(title)}</title>"
+            "<meta name='viewport' content='width=device-width,initial-scale=1'>"
+            f"<style>{REPORT_CSS}</style></head><body><div class='container'><header>{logo_html}<div><h1>{escape(title)}</h1>")
+
+
+def _report_intro(count, scan_time, post_forms=False):
+    kind = "Security analysis (POST forms submitted)" if post_forms else "Passive security analysis"
+    return f"<div class='muted'>{kind} for {count} domain(s). Report generated on: {escape(scan_time)}.</div>"
+
+
+def _report_footer(post_forms=False):
+    if post_forms:
+        note = ("Note: This scan submitted same-origin POST forms with test values (--scan-post-forms), "
+                "which may have created records or triggered actions on the target.")
+    else:
+        note = "Note: This is a passive, non-destructive scan."
+    return f"<footer>{note} Validate findings manually and obtain authorization before testing further.</footer>"
+
 
-    html.append("<header>")
-    html.append(logo_html)
-    html.append("<div><h1>Web Flaw Discovery Report</h1>")
-    html.append(f"<div class='muted'>Passive security analysis for {len(overall_results)} domain(s). Report generated on: {escape(scan_time)}.</div>")
+def save_professional_html(domain_summaries, outdir, stream, logo_b64=None, post_forms=False):
+    """
+    Summary HTML assembled in one pass from the stream's counters and per-domain fragments.
+    post_forms (the run submitted POST forms) switches the passive-scan wording.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    path = os.path.join(outdir, "security_scan_summary.html")
+
+    # top-level counts
+    counts = [stream.domain_counts(dom["domain"]) for dom in domain_summaries]
+    total_endpoints = sum(c["endpoints"] for c in counts)
+    total_xss = sum(c["xss"] for c in counts)
+    total_sqli = sum(c["sqli"] for c in counts)
+    total_open = sum(c["open_redirect"] for c in counts)
+    scan_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+
+    html = [_report_head("Web Flaw Discovery Report", logo_b64)]
+    html.append(_report_intro(len(domain_summaries), scan_time, post_forms))
     html.append("<div class='summary'>")
-    html.append(f"<div class='card'><div class='small'>Websites</div><strong>{len(overall_results)}</strong></div>")
+    html.append(f"<div class='card'><div class='small'>Websites</div><strong>{len(domain_summaries)}</strong></div>")
     html.append(f"<div class='card'><div class='small'>Endpoints Checked</div><strong>{total_endpoints}</strong></div>")
     html.append(f"<div class='card'><div class='small'>Potential XSS Findings</div><strong>{total_xss}</strong></div>")
     html.append(f"<div class='card'><div class='small'>SQLi Findings</div><strong>{total_sqli}</strong></div>")
     html.append(f"<div class='card'><div class='small'>Open-Redirects</div><strong>{total_open}</strong></div>")
     html.append("</div></div></header>")
 
-    # per-domain
-    for i, dom in enumerate(overall_results, start=1):
-        domain = dom.get("domain")
-        eps = dom.get("endpoints", [])
-        html.append(f"<section><h2>{escape(domain)} <span class='small'>( {len(eps)} Endpoints Checked )</span></h2>")
-        # total potential per domain
-        domain_potential = sum(len(e.get("xss_candidates", [])) for e in eps)
-        html.append(f"<div style='color:#c43; font-weight:700; margin-bottom:8px'>Total Potential Findings: {domain_potential}</div>")
-
-        if not eps:
-            html.append("<div class='endpoint'>No endpoints discovered.</div>")
-        for e in eps:
-            html.append("<div class='endpoint'>")
-            html.append(f"<div class='url'>{escape(e.get('url'))}</div>")
-            # quick summary line
-            xcount = len(e.get("xss_candidates", []))
-            scount = len(e.get("sqli", []))
-            ocount = len(e.get("open_redirect", []))
-            if xcount + scount + ocount == 0:
-                html.append("<div class='finding-none' style='margin-top:8px'>Findings: No Immediate Flaws Detected</div>")
-            else:
-                html.append(f"<div style='margin-top:8px'><strong>Findings:</strong></div>")
-
-            # render XSS candidates with potential box (yellow)
-            for f in e.get("xss_candidates", []):
-                if f.get("type") == "reflected":
-                    ctx = f.get("context", "html")
-                    conf = f.get("confidence", "medium")
-                    html.append("<div class='potential'>")
-                    html.append(f"<strong>Potential XSS Injection Point</strong> on parameter <strong>{escape(f.get('param'))}</strong> — <span class='small'>context: {escape(ctx)}, confidence: {escape(conf)}</span>")
-                    html.append(f"<div class='small' style='margin-top:6px'>Evidence: <span class='evidence'>{escape(f.get('evidence'))}</span></div>")
-                    html.append("</div>")
-                else:
-                    # potential low-confidence heuristic
-                    html.append("<div class='potential' style='border-left:6px solid #ffd54a'>")
-                    html.append(f"<strong>Potential XSS (heuristic)</strong> on parameter <strong>{escape(f.get('param'))}</strong>")
-                    html.append(f"<div class='small' style='margin-top:6px'>Reason: {escape(f.get('evidence'))} — confidence: {escape(f.get('confidence'))}</div>")
-                    html.append("</div>")
-
-            # SQLi details
-            if e.get("sqli"):
-                html.append("<div style='margin-top:8px'><strong>SQLi Findings:</strong></div>")
-                html.append("<table><thead><tr><th>Param</th><th>Evidence</th></tr></thead><tbody>")
-                for s in e.get("sqli", []):
-                    html.append(f"<tr><td>{escape(s.get('param'))}</td><td class='evidence'>{escape(s.get('evidence'))}</td></tr>")
-                html.append("</tbody></table>")
-
-            # Open redirect details
-            if e.get("open_redirect"):
-                html.append("<div style='margin-top:8px'><strong>Open-Redirect Findings:</strong></div>")
-                html.append("<table><thead><tr><th>Param</th><th>Location</th></tr></thead><tbody>")
-                for o in e.get("open_redirect", []):
-                    html.append(f"<tr><td>{escape(o.get('param'))}</td><td class='evidence'>{escape(o.get('evidence'))}</td></tr>")
-                html.append("</tbody></table>")
-
-            html.append("</div>")  # endpoint
-        html.append("</section>")
-
-    html.append("<footer>Note: This is a passive, non-destructive scan. Validate findings manually and obtain authorization before testing further.</footer>")
-    html.append("</div></body></html>")
-
     with open(path, "w", encoding="utf-8") as fh:
         fh.write("".join(html))
+
+        # per-domain: section head from the counters, then the streamed endpoint blocks
+        for dom, c in zip(domain_summaries, counts):
+            domain = dom.get("domain")
+            fh.write(f"<section><h2>{escape(domain)} <span class='small'>( {c['endpoints']} Endpoints Checked )</span></h2>")
+            # total potential per domain
+            fh.write(f"<div style='color:#c43; font-weight:700; margin-bottom:8px'>Total Potential Findings: {c['xss']}</div>")
+            if dom.get("skipped_equivalent"):
+                fh.write(f"<div class='small' style='margin-bottom:8px'>{dom['skipped_equivalent']} equivalent endpoint(s) skipped (same path and parameter names)</div>")
+            fh.write(render_clusters_html(dom.get("near_duplicates")))
+            if not c["endpoints"]:
+                fh.write("<div class='endpoint'>No endpoints discovered.</div>")
+            else:
+                try:
+                    with open(stream.fragment_path(domain), "r", encoding="utf-8") as frag:
+                        shutil.copyfileobj(frag, fh)
+                except OSError:
+                    pass
+            fh.write("</section>")
+
+        fh.write(_report_footer(post_forms))
+        fh.write("</div></body></html>")
     return path
 
 
+# ----- Reporting: paged report (index + per-domain detail pages) -----
+# For large scans: the index lists per-domain totals only, and every domain gets
+# its own detail page holding its findings as compact embedded JSON. The browser
+# filters that array and renders one page of endpoints at a time.
+
+SEVERITY_ORDER = ("high", "medium", "low")
+
+PAGED_SCRIPT = """
+const DATA = JSON.parse(document.getElementById('findings').textContent);
+const PAGE_SIZE = 50;
+const CHECK_LABEL = {xss: 'XSS', sqli: 'SQLi', open_redirect: 'Open-Redirect'};
+let view = DATA.endpoints, page = 0;
+const $ = id => document.getElementById(id);
+function el(tag, cls, text) {
+  const n = document.createElement(tag);
+  if (cls) n.className = cls;
+  if (text !== undefined) n.textContent = text;
+  return n;
+}
+function matches(e, sev, chk, q) {
+  if (q && e[0].toLowerCase().indexOf(q) < 0) return false;
+  if (chk === 'none') return e[1].length === 0;
+  if (!sev && !chk) return true;
+  return e[1].some(f => (!sev || f[1] === sev) && (!chk || f[0] === chk));
+}
+function apply() {
+  const sev = $('sev').value, chk = $('chk').value, q = $('q').value.trim().toLowerCase();
+  view = DATA.endpoints.filter(e => matches(e, sev, chk, q));
+  page = 0;
+  render();
+}
+function card(e) {
+  const box = el('div', 'endpoint');
+  box.appendChild(el('div', 'url', e[0]));
+  if (e[2]) box.appendChild(el('div', 'small', 'Unchanged since last scan; findings carried forward (last verified: ' + e[2] + ')'));
+  if (!e[1].length) box.appendChild(el('div', 'finding-none', 'Findings: No Immediate Flaws Detected'));
+  for (const f of e[1]) {
+    const row = el('div', 'potential sev-' + f[1]);
+    row.appendChild(el('strong', '', CHECK_LABEL[f[0]] + ' (' + f[1] + ')'));
+    row.appendChild(document.createTextNode(' on parameter '));
+    row.appendChild(el('strong', '', f[2]));
+    if (f[4]) row.appendChild(el('span', 'small', ' \\u2014 ' + f[4]));
+    const ev = el('div', 'small', 'Evidence: ');
+    ev.appendChild(el('span', 'evidence', f[3]));
+    row.appendChild(ev);
+    box.appendChild(row);
+  }
+  return box;
+}
+function render() {
+  const pages = Math.max(1, Math.ceil(view.length / PAGE_SIZE));
+  page = Math.min(Math.max(page, 0), pages - 1);
+  const list = $('list'), frag = document.createDocumentFragment();
+  for (const e of view.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)) frag.appendChild(card(e));
+  list.textContent = '';
+  list.appendChild(frag);
+  $('pos').textContent = view.length + ' endpoint(s) \\u2014 page ' + (page + 1) + ' of ' + pages;
+}
+$('sev').onchange = $('chk').onchange = apply;
+$('q').oninput = apply;
+$('prev').onclick = () => { page--; render(); };
+$('next').onclick = () => { page++; render(); };
+apply();
+"""
+
+
+def finding_severity(check, finding):
+    """Report severity of one finding: injection evidence ranks above name heuristics."""
+    if check == "xss":
+        if finding.get("type") != "reflected":
+            return "low"
+        return "high" if finding.get("confidence") == "high" else "medium"
+    if check == "sqli":
+        return "high"
+    return "medium"
+
+
+def compact_endpoint(e):
+    """[url, [[check, severity, param, evidence, note], ...], last_verified if carried forward else None]"""
+    findings = []
+    for f in e.get("xss_candidates", []):
+        note = f"context: {f.get('context')}" if f.get("type") == "reflected" else "heuristic"
+        findings.append(["xss", finding_severity("xss", f), f.get("param"), f.get("evidence"), note])
+    for f in e.get("sqli", []):
+        findings.append(["sqli", finding_severity("sqli", f), f.get("param"), f.get("evidence"), f.get("dbms") or ""])
+    for f in e.get("open_redirect", []):
+        findings.append(["open_redirect", finding_severity("open_redirect", f), f.get("param"), f.get("evidence"), ""])
+    return [e.get("url"), findings, (e.get("last_verified") or "unknown") if e.get("carried_forward") else None]
+
+
+def _embedded_json(obj):
+    # "<" is escaped so evidence text can never close the <script> element
+    return json.dumps(obj, separators=(",", ":")).replace("<", "\\u003c")
+
+
+def save_paged_report(domain_summaries, outdir, stream, logo_b64=None, post_forms=False):
+    """
+    Write security_scan_index.html plus one report.html per domain directory.
+    Detail pages are built from the per-domain JSON, one domain at a time.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    index_path = os.path.join(outdir, "security_scan_index.html")
+    scan_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    footer = _report_footer(post_forms) + "</div></body></html>"
+    rows = []
+    for dom in domain_summaries:
+        domain = dom["domain"]
+        c = stream.domain_counts(domain)
+        dom_dir = domain_output_dir(outdir, domain)
+        os.makedirs(dom_dir, exist_ok=True)
+        try:
+            with open(os.path.join(dom_dir, "security_scan_report.json"), "r", encoding="utf-8") as fh:
+                endpoints = json.load(fh)
+        except (OSError, ValueError):
+            endpoints = []
+        data = {"domain": domain, "endpoints": [compact_endpoint(e) for e in endpoints]}
+        del endpoints
+        with open(os.path.join(dom_dir, "report.html"), "w", encoding="utf-8") as fh:
+            fh.write(_report_head(f"{domain} — Findings", logo_b64))
+            fh.write(f"<div class='muted'>{c['endpoints']} endpoints checked · {c['high']} high · {c['medium']} medium · {c['low']} low"
+                     f" · <a href='../security_scan_index.html'>All domains</a></div></div></header>")
+            fh.write(render_clusters_html(dom.get("near_duplicates")))
+            fh.write("<div class='controls'><select id='sev'><option value=''>All severities</option>"
+                     + "".join(f"<option value='{s}'>{s.title()}</option>" for s in SEVERITY_ORDER)
+                     + "</select><select id='chk'><option value=''>All checks</option><option value='xss'>XSS</option>"
+                       "<option value='sqli'>SQLi</option><option value='open_redirect'>Open-Redirect</option>"
+                       "<option value='none'>No findings</option></select>"
+                       "<input id='q' type='search' placeholder='Filter URLs'>"
+                       "<button id='prev'>&lsaquo; Prev</button><button id='next'>Next &rsaquo;</button>"
+                       "<span id='pos' class='small'></span></div><div id='list'></div>")
+            fh.write(f"<script type='application/json' id='findings'>{_embedded_json(data)}</script>")
+            fh.write(f"<script>{PAGED_SCRIPT}</script>")
+            fh.write(footer)
+        del data
+        link = os.path.relpath(os.path.join(dom_dir, "report.html"), outdir).replace(os.sep, "/")
+        rows.append(f"<tr><td><a href='{escape(link)}'>{escape(domain)}</a></td><td>{c['endpoints']}</td>"
+                    f"<td>{c['high']}</td><td>{c['medium']}</td><td>{c['low']}</td>"
+                    f"<td>{c['xss']}</td><td>{c['sqli']}</td><td>{c['open_redirect']}</td></tr>")
+
+    with open(index_path, "w", encoding="utf-8") as fh:
+        fh.write(_report_head("Web Flaw Discovery Report", logo_b64))
+        fh.write(_report_intro(len(domain_summaries), scan_time, post_forms) + "</div></header>")
+        fh.write("<table><thead><tr><th>Domain</th><th>Endpoints</th><th>High</th><th>Medium</th><th>Low</th>"
+                 "<th>XSS</th><th>SQLi</th><th>Open-Redirects</th></tr></thead><tbody>")
+        fh.write("".join(rows))
+        fh.write("</tbody></table>")
+        fh.write(footer)
+    return index_path
+
+
 # ----- Orchestration / CLI -----
 
 
+class HostSlots:
+    """Caps how many domain scans may run against the same host at once."""
+
+    def __init__(self, per_host=1):
+        self.per_host = max(1, per_host)
+        self.lock = threading.Lock()
+        self.slots = {}
+
+    def slot(self, host):
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.slots[host]
+
+
+def scan_domain(domain, args, session, http_cache=None, previous=None, journal=None, stream=None, parse_pool=None,
+                stop=None):
+    """
+    Crawl one domain and scan its endpoints; scanning starts on the first endpoints
+    while the crawl is still running. Results are emitted to stream (ReportStream)
+    as they complete and written, sorted by URL, to the domain's security_scan_report.json.
+    Returns the domain summary {"domain", "skipped_equivalent", "carried_forward", "near_duplicates"}.
+    previous ({url: endpoint result} from an earlier run) enables incremental mode:
+    endpoints whose page content hash is unchanged keep their earlier findings
+    instead of being scanned again.
+    journal (ScanJournal) receives crawl checkpoints and each finished endpoint;
+    when it holds state for this domain from an interrupted run, the domain
+    continues from there (finished domains are rebuilt without any request).
+    stop (threading.Event) interrupts the domain: the crawl checkpoints and ends,
+    queued endpoints are left unscanned, and the summary is marked "interrupted"
+    (the journal does not mark the domain done, so --resume continues it).
+    """
+    stop = stop or threading.Event()
+    resumed = journal.domain_state(domain) if journal is not None else None
+    if stream is not None:
+        if resumed and resumed["results"]:
+            # already streamed by the interrupted run
+            for res in resumed["results"].values():
+                stream.count(domain, res)
+        else:
+            stream.start_domain(domain)
+    if resumed and resumed["done"]:
+        print(f"[+] Resumed {domain} from journal ({len(resumed['results'])} endpoints)")
+        return {"domain": domain, "skipped_equivalent": resumed["done"].get("skipped_equivalent", 0),
+                "carried_forward": resumed["done"].get("carried_forward", 0),
+                "near_duplicates": resumed["done"].get("near_duplicates", [])}
+
+    print(f"\n[+] Starting scan for: {domain}")
+    domain_out = domain_output_dir(args.output, domain)
+    os.makedirs(domain_out, exist_ok=True)
+    report_path = os.path.join(domain_out, "security_scan_report.json")
+    # empty an earlier run's report first: if this domain fails, the aggregate and
+    # paged reports must not pick up its stale endpoints
+    with open(report_path, "w", encoding="utf-8") as fh:
+        fh.write("[]")
+    baseline_cache = BaselineCache(args.baseline_cache)
+    discoverer = EndpointDiscoverer(domain, max_pages=args.max_pages, session=session,
+                                    concurrency=args.crawl_concurrency, link_extractor=args.link_extractor,
+                                    baseline_cache=baseline_cache,
+                                    http_cache=http_cache, parse_pool=parse_pool, crawl_order=args.crawl_order,
+                                    state_mode=args.crawl_state, bloom_fp_rate=args.bloom_fp_rate,
+                                    frontier_memory=args.frontier_memory)
+    discoverer.stop = stop
+    discoverer.post_forms = args.scan_post_forms
+    scanner = VulnerabilityScanner(session=session, baseline_cache=baseline_cache,
+                                   batch_reflection=not args.no_batch_reflection, parse_pool=parse_pool)
+    results = []
+    done_urls = set(resumed["results"]) if resumed else set()
+    results.extend(resumed["results"].values() if resumed else ())
+    scan_time = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    outstanding = set()  # handed to the scan queue, not finished (recorded in crawl checkpoints)
+
+    def finished(res):
+        outstanding.discard(res["url"])
+        results.append(res)
+        if stream is not None:
+            stream.emit(domain, res)
+        if journal is not None:
+            journal.record("endpoint", domain, result=res)
+
+    # crawl and scan run as a pipeline: the crawler hands each endpoint to a bounded
+    # queue as soon as it is final and the scan workers drain it while the crawl
+    # goes on; a full queue blocks the crawler, an empty one idles the workers
+    selector = EndpointSelector(args.per_template)
+    # endpoints passed on for scanning, only kept for the journal's "crawled" record
+    selected = [url for url in sorted(done_urls) if selector.admit(url)] if journal is not None else None
+    pending = queue.Queue(maxsize=max(1, args.threads) * SCAN_QUEUE_PER_WORKER)
+    # near-identical pages of one template (incl. soft-404 copies) are scanned at most near_dup_cap times
+    near_dups = NearDuplicateIndex(args.near_dup_cap) if args.near_dup_cap > 0 else None
+    if previous:
+        # last run's picks keep their slots, so unchanged ones are carried forward rather than
+        # replaced by whichever equivalent endpoint the crawl happens to hand over first
+        for url in sorted(previous):
+            if selector.reserve(url) and near_dups is not None:
+                near_dups.reserve(url, previous[url].get("content_hash"))
+
+    def submit(url):
+        if url in done_urls:
+            return
+        if stop.is_set():
+            outstanding.add(url)  # found while stopping: the last checkpoint hands it to a resumed run
+            return
+        if not selector.admit(url):
+            return
+        fingerprint = discoverer.fingerprint(url)
+        if near_dups is not None and not near_dups.admit(url, fingerprint, discoverer.sketches.get(url)):
+            return
+        if selected is not None:
+            selected.append(url)
+        # incremental mode: carry forward unchanged endpoints
+        prev = previous.get(url) if previous else None
+        if prev is not None and fingerprint is not None and prev.get("content_hash") == fingerprint:
+            res = dict(prev)
+            res["carried_forward"] = True
+            res.setdefault("last_verified", None)
+            finished(res)
+            return
+        outstanding.add(url)
+        pending.put(url)
+
+    def scan_worker():
+        while True:
+            url = pending.get()
+            if url is None:
+                return
+            if stop.is_set():
+                continue  # stays outstanding; a resumed run scans it
+            try:
+                res = scanner.scan_endpoint(url)
+                res["content_hash"] = discoverer.fingerprint(url)
+                res["last_verified"] = scan_time
+                res["carried_forward"] = False
+                finished(res)
+                print(f"[=] Scanned {url} -> xss_candidates:{len(res['xss_candidates'])} sqli:{len(res['sqli'])} open_redirect:{len(res['open_redirect'])}")
+            except Exception as exc:
+                print(f"[!] Error scanning {url}: {exc}")
+
+    workers = max(1, args.threads)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for _ in range(workers):
+            ex.submit(scan_worker)
+        try:
+            if resumed and resumed["crawled"]:
+                crawled = resumed["crawled"]
+                for url, fingerprint in crawled["fingerprints"].items():
+                    discoverer.set_fingerprint(url, fingerprint)
+                print(f"[+] Resuming {domain}: crawl already complete, {len(done_urls)} endpoints already scanned")
+                for url in crawled["endpoints"]:
+                    submit(url)
+                skipped = crawled["skipped"]
+                clusters = crawled.get("near_duplicates", [])
+            else:
+                if journal is not None:
+                    # set.copy() is atomic, the scan workers keep discarding from outstanding
+                    discoverer.checkpoint = lambda state: journal.record(
+                        "frontier", domain, pending=sorted(outstanding.copy()), **state)
+                    if resumed and resumed["frontier"]:
+                        discoverer.resume_state = resumed["frontier"]
+                        visited = len(resumed["frontier"]["visited"])
+                        print(f"[+] Resuming crawl of {domain} from checkpoint ({visited} pages visited)")
+                if near_dups is not None:
+                    soft_404 = discoverer.probe_soft_404()
+                    if soft_404 is not None:
+                        print(f"[+] {domain} answers unknown URLs with a page (soft-404); matching pages are collapsed")
+                        _, fingerprint, sketch = soft_404
+                        near_dups.add_soft_404(fingerprint, sketch)
+                if args.sitemaps and not (resumed and resumed["frontier"]):
+                    discoverer.seeds = discoverer.sitemap_seeds()
+                    print(f"[+] Seeded the crawl of {domain} with {len(discoverer.seeds)} URLs from robots.txt / sitemaps")
+                discoverer.on_endpoint = submit
+                found = discoverer.crawl()
+                print(f"[+] Found {found} endpoints for {domain}")
+                skipped = selector.skipped
+                clusters = near_dups.collapsed() if near_dups is not None else []
+                if journal is not None and not stop.is_set():
+                    journal.record("crawled", domain, endpoints=selected, skipped=skipped, near_duplicates=clusters,
+                                   fingerprints={url: discoverer.fingerprint(url) for url in selected
+                                                 if discoverer.fingerprint(url) is not None})
+        finally:
+            for _ in range(workers):
+                pending.put(None)
+    skipped_total = sum(skipped.values())
+    if skipped_total:
+        print(f"[+] Skipped {skipped_total} equivalent endpoints in {len(skipped)} templates for {domain}")
+    if clusters:
+        print(f"[+] Collapsed {sum(c['skipped'] for c in clusters)} near-duplicate endpoints in {len(clusters)} clusters for {domain}")
+    carried = sum(1 for res in results if res.get("carried_forward"))
+    if previous:
+        print(f"[+] Incremental: {carried} unchanged endpoints carried forward for {domain}")
+    print(f"[+] Baseline cache for {domain}: {baseline_cache.hits} hits, {baseline_cache.misses} fetches")
+
+    results.sort(key=lambda res: res["url"])
+
+    # write per-domain JSON (optional)
+    try:
+        with open(report_path, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+    except Exception:
+        pass
+
+    summary = {"domain": domain, "skipped_equivalent": skipped_total, "carried_forward": carried,
+               "near_duplicates": clusters}
+    if stop.is_set():
+        print(f"[!] {domain} interrupted after {len(results)} endpoints")
+        summary["interrupted"] = True
+    elif journal is not None:
+        journal.record("domain_done", domain, skipped_equivalent=skipped_total, carried_forward=carried,
+                       near_duplicates=clusters)
+    return summary
+
+
 def main():
     parser = argparse.ArgumentParser(description="Security_Scanner - enhanced heuristics + professional report")
     parser.add_argument("--domain", help="Single domain or base URL to scan (e.g. example.com)")
@@ -418,7 +2793,62 @@ def main():
     parser.add_argument("--domains-file", help="Path to a file with one domain/URL per line")
     parser.add_argument("--max-pages", type=int, default=200, help="Maximum pages to crawl per domain")
     parser.add_argument("--threads", type=int, default=12, help="Worker threads for scanning")
+    parser.add_argument("--crawl-concurrency", type=int, default=4, help="Maximum in-flight page fetches per domain while crawling")
+    parser.add_argument("--crawl-order", choices=("priority", "bfs"), default="priority",
+                        help="Crawl frontier order: priority (parameterized URLs, form actions and script pages first) "
+                             "or plain breadth-first")
+    parser.add_argument("--sitemaps", action="store_true",
+                        help="Seed the crawl with the URLs listed in robots.txt sitemaps / sitemap.xml (incl. indexes and .gz)")
+    parser.add_argument("--crawl-state", choices=["exact", "fingerprint", "bloom"], default="exact",
+                        help="Crawl bookkeeping: full URL sets (exact), 64-bit URL fingerprints, or fingerprints plus "
+                             "a Bloom filter for visited/queued URLs (bloom) for very large crawls")
+    parser.add_argument("--bloom-fp-rate", type=float, default=0.001,
+                        help="False-positive rate of --crawl-state bloom; a false positive skips that URL (default 0.001)")
+    parser.add_argument("--frontier-memory", type=int, default=0,
+                        help="Max crawl frontier entries kept in memory per domain; the rest spill to a temporary "
+                             "sqlite file (0 = keep all in memory)")
+    parser.add_argument("--link-extractor", choices=sorted(LINK_EXTRACTORS), default="stream",
+                        help="HTML link extractor: stream (stdlib tokenizer, default), lxml (C-backed, optional) or bs4 (full parse)")
+    parser.add_argument("--per-template", type=int, default=3,
+                        help="Maximum endpoints scanned per path + parameter-name template (0 = no limit); "
+                             "every page is still crawled")
+    parser.add_argument("--scan-post-forms", action="store_true",
+                        help="Also submit same-origin POST forms (login, signup, contact...) with XSS / SQLi test "
+                             "values; this is not passive and may create records on the target (GET forms are always scanned)")
+    parser.add_argument("--near-dup-cap", type=int, default=3,
+                        help="Maximum endpoints scanned per cluster of near-identical pages of one endpoint template "
+                             "(incl. soft-404 copies); 0 = off")
+    parser.add_argument("--baseline-cache", type=int, default=512,
+                        help="Maximum baseline pages kept in memory per domain (LRU)")
+    parser.add_argument("--no-batch-reflection", action="store_true",
+                        help="Probe reflection one parameter per request instead of all parameters in one request")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="Per-request timeout in seconds")
+    parser.add_argument("--rate", type=float, default=10.0,
+                        help="Initial requests/second per host; adapts to latency, 429/503 and Retry-After (0 = no limit)")
+    parser.add_argument("--max-body-kb", type=int, default=MAX_BODY_BYTES // 1024,
+                        help="Maximum response body size read per request (KiB); the crawler skips binary/media bodies")
+    parser.add_argument("--max-rate", type=float, default=50.0, help="Upper bound for the adaptive per-host request rate")
+    parser.add_argument("--domain-concurrency", type=int, default=4, help="Maximum number of domains scanned at the same time")
+    parser.add_argument("--per-host", type=int, default=1, help="Maximum concurrent domain scans against the same host")
     parser.add_argument("--output", default="reports", help="Output directory for reports")
+    parser.add_argument("--http-cache", nargs="?", const="", default=None, metavar="PATH",
+                        help="Persistent crawl cache for conditional re-crawls (default path: <output>/http_cache.sqlite)")
+    parser.add_argument("--incremental", nargs="?", const="", default=None, metavar="PREVIOUS_JSON",
+                        help="Only re-test new or changed endpoints; unchanged ones keep the findings from the previous "
+                             "aggregated JSON (default: <output>/security_scan_report.json). Best combined with --http-cache")
+    parser.add_argument("--journal", action="store_true",
+                        help="Journal finished endpoints and crawl checkpoints to <output>/scan_journal.ndjson so an "
+                             "interrupted run can be continued with --resume")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted --journal run from <output>/scan_journal.ndjson: finished domains "
+                             "and endpoints are taken from the journal, unfinished crawls restart from their last "
+                             "checkpoint (implies --journal)")
+    parser.add_argument("--parse-processes", nargs="?", type=int, const=os.cpu_count() or 1, default=0, metavar="N",
+                        help="Run HTML parsing and response matching on N worker processes "
+                             "(default without N: one per CPU core; 0 = in the I/O threads)")
+    parser.add_argument("--report-mode", choices=("single", "paged", "both"), default="single",
+                        help="HTML output: one summary file, a paged index with per-domain detail pages "
+                             "(filterable, for large scans), or both")
     parser.add_argument("--logo", help="Path to PNG/JPG logo to embed in the HTML header (optional)")
     args = parser.parse_args()
 
@@ -443,47 +2873,118 @@ def main():
         print("[!] No domains provided. Use --domain, --domains or --domains-file")
         return
 
-    logo_b64 = embed_logo_base64(args.logo) if args.logo else None
-
-    session = requests.Session()
-    overall_results = []
+    if args.incremental == "":
+        args.incremental = os.path.join(args.output, "security_scan_report.json")
+    if args.http_cache == "":
+        args.http_cache = os.path.join(args.output, "http_cache.sqlite")
 
-    for domain in domains:
-        print(f"\n[+] Starting scan for: {domain}")
-        discoverer = EndpointDiscoverer(domain, max_pages=args.max_pages, session=session)
-        endpoints = discoverer.crawl()
-        print(f"[+] Found {len(endpoints)} endpoints for {domain}")
+    if args.link_extractor == "lxml" and lxml_etree is None:
+        print("[!] lxml is not installed; using the stream link extractor")
+        args.link_extractor = "stream"
 
-        scanner = VulnerabilityScanner(session=session)
-        results = []
-        domain_out = os.path.join(args.output, re.sub(r"[^A-Za-z0-9._-]", "_", domain))
-        os.makedirs(domain_out, exist_ok=True)
+    if args.crawl_state == "bloom" and not 0 < args.bloom_fp_rate < 1:
+        print("[!] --bloom-fp-rate must be between 0 and 1; using 0.001")
+        args.bloom_fp_rate = 0.001
 
-        # scan endpoints concurrently
-        with ThreadPoolExecutor(max_workers=args.threads) as ex:
-            futures = {ex.submit(scanner.scan_endpoint, url): url for url in endpoints}
-            for fut in as_completed(futures):
-                url = futures[fut]
-                try:
-                    res = fut.result()
-                    results.append(res)
-                    print(f"[=] Scanned {url} -> xss_candidates:{len(res['xss_candidates'])} sqli:{len(res['sqli'])} open_redirect:{len(res['open_redirect'])}")
-                except Exception as exc:
-                    print(f"[!] Error scanning {url}: {exc}")
+    logo_b64 = embed_logo_base64(args.logo) if args.logo else None
 
-        # write per-domain JSON (optional)
+    # every thread that may talk to one host at the same time gets a pooled keep-alive connection
+    per_host_workers = (args.threads + args.crawl_concurrency) * max(1, args.per_host)
+    rate_limiter = HostRateLimiter(initial_rate=args.rate, max_rate=args.max_rate) if args.rate > 0 else None
+    session = build_session(pool_maxsize=per_host_workers,
+                            pool_connections=max(10, 2 * args.domain_concurrency),
+                            timeout=args.timeout, rate_limiter=rate_limiter,
+                            max_body_bytes=max(1, args.max_body_kb) * 1024)
+    host_slots = HostSlots(args.per_host)
+    http_cache = CrawlCache(args.http_cache) if args.http_cache else None
+    previous = load_previous_results(args.incremental) if args.incremental else {}
+    journal = None
+    if args.journal or args.resume:
+        journal = ScanJournal(os.path.join(args.output, "scan_journal.ndjson"), resume=args.resume)
+    stream = ReportStream(args.output, resume=args.resume)
+    parse_pool = ParsePool(args.parse_processes)
+    if parse_pool.processes:
+        print(f"[+] Parsing and matching on {parse_pool.processes} worker processes")
+    if args.resume:
+        finished = sum(1 for d in domains if (journal.domain_state(d) or {}).get("done"))
+        print(f"[+] Resuming from {journal.path}: {finished}/{len(domains)} domains already finished")
+
+    def domain_host(domain):
+        return urlparse(normalize_base_url(domain)).hostname or domain
+
+    stop = threading.Event()
+
+    def run_domain(domain):
+        with host_slots.slot(domain_host(domain)):
+            return scan_domain(domain, args, session, http_cache, previous.get(domain), journal, stream, parse_pool,
+                               stop)
+
+    # interleave hosts in the submission order so domains sharing a host do not
+    # occupy every worker while they wait for that host's slot
+    seen_per_host = {}
+    order = []
+    for i, domain in enumerate(domains):
+        host = domain_host(domain)
+        order.append((seen_per_host.get(host, 0), i))
+        seen_per_host[host] = seen_per_host.get(host, 0) + 1
+    order.sort()
+
+    # scan several domains at once; endpoint results stream to disk, summaries keep the input order
+    overall_results = [None] * len(domains)
+
+    def collect(fut, i):
         try:
-            with open(os.path.join(domain_out, "security_scan_report.json"), "w", encoding="utf-8") as fh:
-                json.dump(results, fh, indent=2)
-        except Exception:
-            pass
-
-        overall_results.append({"domain": domain, "endpoints": results})
+            overall_results[i] = fut.result()
+        except Exception as exc:
+            print(f"[!] Error scanning domain {domains[i]}: {exc}")
+            overall_results[i] = {"domain": domains[i]}
 
+    ex = ThreadPoolExecutor(max_workers=max(1, args.domain_concurrency))
+    try:
+        futures = {ex.submit(run_domain, domains[i]): i for _, i in order}
+        try:
+            for fut in as_completed(futures):
+                collect(fut, futures[fut])
+        except KeyboardInterrupt:
+            # stop the running domains, never start the queued ones, report what finished
+            print("\n[!] Interrupted: stopping crawls and scans, then writing reports for finished work")
+            stop.set()
+            ex.shutdown(wait=True, cancel_futures=True)
+            for fut, i in futures.items():
+                if not fut.cancelled():
+                    collect(fut, i)
+    finally:
+        ex.shutdown()
+        # keep everything finished so far durable for --resume
+        if journal is not None:
+            journal.close()
+        stream.close()
+        parse_pool.close()
+        if http_cache is not None:
+            http_cache.close()
+
+    if stop.is_set():
+        print(f"[!] Reporting {sum(1 for dom in overall_results if dom is not None)}/{len(domains)} domains; "
+              + ("run again with --resume to finish the rest" if journal is not None
+                 else "use --journal to make interrupted runs resumable"))
+    overall_results = [dom for dom in overall_results if dom is not None]
     agg_json = save_aggregated_json(overall_results, args.output)
-    html = save_professional_html(overall_results, args.output, logo_b64=logo_b64)
-    print(f"\n[+] Aggregated JSON report: {agg_json}")
-    print(f"[+] Professional HTML summary: {html}")
+    html = index = None
+    if args.report_mode in ("single", "both"):
+        html = save_professional_html(overall_results, args.output, stream, logo_b64=logo_b64,
+                                      post_forms=args.scan_post_forms)
+    if args.report_mode in ("paged", "both"):
+        index = save_paged_report(overall_results, args.output, stream, logo_b64=logo_b64,
+                                  post_forms=args.scan_post_forms)
+    if http_cache is not None:
+        print(f"\n[+] Crawl cache: {http_cache.revalidated} pages unchanged (304), {http_cache.refreshed} fetched and stored")
+    print(f"\n[+] HTTP connection pool: {session.pool_stats.summary()}")
+    print(f"[+] Aggregated JSON report: {agg_json}")
+    print(f"[+] Streamed endpoint results (NDJSON): {stream.path}")
+    if html:
+        print(f"[+] Professional HTML summary: {html}")
+    if index:
+        print(f"[+] Paged HTML report (index + per-domain pages): {index}")
 
 
 if __name__ == "__main__":
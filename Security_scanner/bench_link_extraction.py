@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_link_extraction.py
+
+Benchmarks the link extractors used by Security_Scanner's crawler and checks that
+each one yields the same link set as the BeautifulSoup parse.
+
+Usage:
+  python bench_link_extraction.py                       # synthetic large pages
+  python bench_link_extraction.py page1.html page2.html # saved real-world pages
+  python bench_link_extraction.py --size-kb 4000 --repeat 5
+"""
+import argparse
+import random
+import time
+
+from Security_Scanner import extract_links, lxml_etree
+
+BASE_URL = "http://bench.example/section/index.html"
+
+
+def synthetic_page(size_kb, seed=1):
+    """Build a page shaped like a large real-world site: nav menus, inline scripts/styles, forms, tables, comments."""
+    rnd = random.Random(seed)
+    parts = ["<!doctype html><html><head><meta charset='utf-8'><title>Catalogue</title>",
+             "<link rel='stylesheet' href='/static/site.css?v=3'><link rel='icon' href='/favicon.ico'>",
+             "<script src='/static/app.js' async></script><style>.x{color:red}</style></head><body>"]
+    size = sum(len(p) for p in parts)
+    i = 0
+    while size < size_kb * 1024:
+        i += 1
+        kind = rnd.randrange(8)
+        if kind == 0:
+            chunk = "<nav><ul>" + "".join(
+                f"<li><a href='/cat/{rnd.randrange(500)}/?page={rnd.randrange(20)}&amp;sort=asc'>Category {j}</a></li>"
+                for j in range(10)) + "</ul></nav>"
+        elif kind == 1:
+            chunk = ("<script>var cfg={url:'/api/v1/items?id=%d',html:'<a href=\"/not-a-link\">x</a>'};"
+                     "if (a < b && c > d) { render(cfg); }</script>" % i)
+        elif kind == 2:
+            chunk = (f"<form action='/search?from={i}' method='get'><input name='q' value='&lt;x&gt;'>"
+                     f"<select name='c'><option value='1'>One</option></select><button>Go</button></form>")
+        elif kind == 3:
+            chunk = "<table>" + "".join(
+                f"<tr><td><a href=\"item.php?id={rnd.randrange(10000)}#reviews\">Item</a></td><td>{rnd.random():.3f}</td></tr>"
+                for _ in range(8)) + "</table>"
+        elif kind == 4:
+            chunk = f"<!-- <a href='/commented/{i}'>old</a> --><p>Lorem ipsum &copy; dolor <b>sit</b> amet {i}</p>"
+        elif kind == 5:
+            chunk = f"<div class='card' data-id='{i}'><img src='/img/{i}.jpg' alt=''><a href='https://cdn.example/{i}'>CDN</a><a href>empty</a></div>"
+        elif kind == 6:
+            chunk = f"<p>Unclosed <a href='/broken/{i}'>link <div>nested <a href=\"../up/{i}\">up</a></p>"
+        else:
+            chunk = f"<a HREF='/Upper/{i}?x=1&y=2'>caps</a><a href='javascript:void(0)'>js</a><a href='mailto:a@b.c'>mail</a>"
+        parts.append(chunk)
+        size += len(chunk)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def run(pages, repeat):
+    names = [n for n in ("bs4", "stream", "lxml") if n != "lxml" or lxml_etree is not None]
+    for label, html in pages:
+        print(f"\n{label}: {len(html) / 1024:.0f} KiB")
+        reference = None
+        for name in names:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                links = extract_links(html, BASE_URL, name)
+            elapsed = (time.perf_counter() - start) / repeat
+            if reference is None:
+                reference = links
+            same = "same links" if links == reference else f"DIFFERS ({len(links ^ reference)} links)"
+            print(f"  {name:<7} {elapsed * 1000:9.1f} ms  {len(links):6d} links  {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Security_Scanner link extractors")
+    parser.add_argument("files", nargs="*", help="Saved HTML pages to benchmark (default: synthetic pages)")
+    parser.add_argument("--size-kb", type=int, default=2000, help="Size of the largest synthetic page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per extractor and page")
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, "r", encoding="utf-8", errors="replace") as fh:
+                pages.append((path, fh.read()))
+    else:
+        pages = [(f"synthetic {kb} KiB", synthetic_page(kb)) for kb in (args.size_kb // 20, args.size_kb // 4, args.size_kb)]
+    run(pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
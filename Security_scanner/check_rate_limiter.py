@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+check_rate_limiter.py
+
+Replays latency scenarios against Security_Scanner's HostRateLimiter on a
+simulated clock and checks that steady, healthy latency never lowers the rate
+(however fast the first replies were) while a host whose latency keeps
+climbing is backed off.
+
+Usage:
+  python check_rate_limiter.py
+  python check_rate_limiter.py --seconds 120 --rate 10 --max-rate 50
+"""
+import argparse
+import sys
+
+import Security_Scanner
+from Security_Scanner import HostRateLimiter
+
+
+class SimulatedClock:
+    """Stands in for the time module inside Security_Scanner: sleep() advances monotonic()."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds + 1e-9
+
+
+def replay(latency_at, seconds, initial_rate, max_rate):
+    """Send back-to-back requests at the limiter's pace; returns [(elapsed, rate)] after each reply."""
+    clock = SimulatedClock()
+    real_time, Security_Scanner.time = Security_Scanner.time, clock
+    try:
+        limiter = HostRateLimiter(initial_rate=initial_rate, max_rate=max_rate)
+        trace = []
+        start = clock.now
+        while clock.now - start < seconds:
+            limiter.acquire("host")
+            limiter.observe("host", latency_at(len(trace), clock.now - start), 200)
+            trace.append((clock.now - start, limiter.rate("host")))
+        return trace
+    finally:
+        Security_Scanner.time = real_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check HostRateLimiter against simulated latency scenarios")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Simulated duration of each scenario")
+    parser.add_argument("--rate", type=float, default=10.0, help="Initial rate (req/s), as --rate")
+    parser.add_argument("--max-rate", type=float, default=50.0, help="Rate ceiling (req/s), as --max-rate")
+    args = parser.parse_args()
+
+    def settled(trace):
+        # rate over the last quarter of the run
+        tail = [rate for elapsed, rate in trace if elapsed >= 0.75 * args.seconds]
+        return min(tail)
+
+    # (name, latency(request index, elapsed seconds), check(trace) -> bool, expectation)
+    scenarios = [
+        ("steady 20 ms", lambda i, t: 0.02,
+         lambda tr: min(r for _, r in tr) >= args.rate, "rate never drops below the initial rate"),
+        ("steady 300 ms", lambda i, t: 0.3,
+         lambda tr: min(r for _, r in tr) >= args.rate, "rate never drops below the initial rate"),
+        ("5 x 20 ms, then steady 300 ms", lambda i, t: 0.02 if i < 5 else 0.3,
+         lambda tr: settled(tr) >= args.rate, "rate recovers above the initial rate"),
+        ("latency doubling every 2 s", lambda i, t: 0.05 * 2 ** (t / 2),
+         lambda tr: tr[-1][1] < max(r for _, r in tr), "rate is backed off"),
+    ]
+    failed = 0
+    print(f"{'scenario':32} {'min':>7} {'end':>7}  expectation")
+    for name, latency_at, check, expectation in scenarios:
+        trace = replay(latency_at, args.seconds, args.rate, args.max_rate)
+        ok = check(trace)
+        failed += not ok
+        print(f"{name:32} {min(r for _, r in trace):7.1f} {trace[-1][1]:7.1f}  "
+              f"{'ok' if ok else 'FAILED'}: {expectation}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()